@@ -3,15 +3,10 @@
 from __future__ import print_function
 
 import argparse
-import glob
-import os
 import os.path as osp
 import sys
 
-import imgviz
-import numpy as np
-
-import labelme
+import labelme.convert
 
 
 def main():
@@ -24,82 +19,21 @@ def main():
     parser.add_argument(
         "--noviz", help="no visualization", action="store_true"
     )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="number of worker processes"
+    )
     args = parser.parse_args()
 
     if osp.exists(args.output_dir):
         print("Output directory already exists:", args.output_dir)
         sys.exit(1)
-    os.makedirs(args.output_dir)
-    os.makedirs(osp.join(args.output_dir, "JPEGImages"))
-    os.makedirs(osp.join(args.output_dir, "SegmentationClass"))
-    os.makedirs(osp.join(args.output_dir, "SegmentationClassPNG"))
-    if not args.noviz:
-        os.makedirs(
-            osp.join(args.output_dir, "SegmentationClassVisualization")
-        )
-    print("Creating dataset:", args.output_dir)
-
-    class_names = []
-    class_name_to_id = {}
-    for i, line in enumerate(open(args.labels).readlines()):
-        class_id = i - 1  # starts with -1
-        class_name = line.strip()
-        class_name_to_id[class_name] = class_id
-        if class_id == -1:
-            assert class_name == "__ignore__"
-            continue
-        elif class_id == 0:
-            assert class_name == "_background_"
-        class_names.append(class_name)
-    class_names = tuple(class_names)
-    print("class_names:", class_names)
-    out_class_names_file = osp.join(args.output_dir, "class_names.txt")
-    with open(out_class_names_file, "w") as f:
-        f.writelines("\n".join(class_names))
-    print("Saved class_names:", out_class_names_file)
-
-    for filename in glob.glob(osp.join(args.input_dir, "*.json")):
-        print("Generating dataset from:", filename)
-
-        label_file = labelme.LabelFile(filename=filename)
-
-        base = osp.splitext(osp.basename(filename))[0]
-        out_img_file = osp.join(args.output_dir, "JPEGImages", base + ".jpg")
-        out_lbl_file = osp.join(
-            args.output_dir, "SegmentationClass", base + ".npy"
-        )
-        out_png_file = osp.join(
-            args.output_dir, "SegmentationClassPNG", base + ".png"
-        )
-        if not args.noviz:
-            out_viz_file = osp.join(
-                args.output_dir,
-                "SegmentationClassVisualization",
-                base + ".jpg",
-            )
-
-        with open(out_img_file, "wb") as f:
-            f.write(label_file.imageData)
-        img = labelme.utils.img_data_to_arr(label_file.imageData)
-
-        lbl, _ = labelme.utils.shapes_to_label(
-            img_shape=img.shape,
-            shapes=label_file.shapes,
-            label_name_to_value=class_name_to_id,
-        )
-        labelme.utils.lblsave(out_png_file, lbl)
-
-        np.save(out_lbl_file, lbl)
-
-        if not args.noviz:
-            viz = imgviz.label2rgb(
-                lbl,
-                imgviz.rgb2gray(img),
-                font_size=15,
-                label_names=class_names,
-                loc="rb",
-            )
-            imgviz.io.imsave(out_viz_file, viz)
+    labelme.convert.voc.convert_segmentation(
+        args.input_dir,
+        args.output_dir,
+        args.labels,
+        noviz=args.noviz,
+        jobs=args.jobs,
+    )
 
 
 if __name__ == "__main__":
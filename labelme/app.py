@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import concurrent.futures
 import functools
 import html
 import math
@@ -9,7 +10,6 @@ import re
 import webbrowser
 
 import imgviz
-import natsort
 from qtpy import QtCore
 from qtpy.QtCore import Qt
 from qtpy import QtGui
@@ -27,6 +27,9 @@ from labelme.shape import Shape
 from labelme.widgets import BrightnessContrastDialog
 from labelme.widgets import Canvas
 from labelme.widgets import FileDialogPreview
+from labelme.widgets import filename_filter
+from labelme.widgets import FileListWidget
+from labelme.widgets import FrameWidget
 from labelme.widgets import LabelDialog
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
@@ -35,10 +38,7 @@ from labelme.widgets import UniqueLabelQListWidget
 from labelme.widgets import ZoomWidget, WcWidget, WwWidget
 
 import gdcm
-import pydicom
-import numpy as np
-import PIL
-import io
+import PIL.Image
 
 # FIXME
 # - [medium] Set max zoom value to something big enough for FitWidth/Window
@@ -54,6 +54,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
     FIT_WINDOW, FIT_WIDTH, MANUAL_ZOOM = 0, 1, 2
 
+    # emitted from the auto save thread with the saved LabelFile
+    labelsAutoSaved = QtCore.Signal(object, str)
+
     def __init__(
         self,
         config=None,
@@ -99,6 +102,18 @@ class MainWindow(QtWidgets.QMainWindow):
         # Whether we need to save or not.
         self.dirty = False
 
+        # edits are auto saved after a pause, by a background thread
+        self.autoSaveTimer = QtCore.QTimer(self)
+        self.autoSaveTimer.setSingleShot(True)
+        self.autoSaveTimer.setInterval(500)
+        self.autoSaveTimer.timeout.connect(self.autoSave)
+        self.autoSaveExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1
+        )
+        self.autoSaveFuture = None
+        self.labelFileHashes = {}  # label file -> hash of its last save
+        self.labelsAutoSaved.connect(self.autoSaved)
+
         self._noSelectionSlot = False
 
         self._copied_shapes = None
@@ -155,8 +170,16 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.fileSearch = QtWidgets.QLineEdit()
         self.fileSearch.setPlaceholderText(self.tr("Search Filename"))
-        self.fileSearch.textChanged.connect(self.fileSearchChanged)
-        self.fileListWidget = QtWidgets.QListWidget()
+        self.fileSearch.setToolTip(
+            self.tr("Substring, glob (*.dcm) or regex (re:^.*_0+\\.dcm$)")
+        )
+        # filter once typing pauses instead of on every keystroke
+        self.fileSearchTimer = QtCore.QTimer(self)
+        self.fileSearchTimer.setSingleShot(True)
+        self.fileSearchTimer.setInterval(150)
+        self.fileSearchTimer.timeout.connect(self.fileSearchChanged)
+        self.fileSearch.textChanged.connect(self.fileSearchTimer.start)
+        self.fileListWidget = FileListWidget()
         self.fileListWidget.itemSelectionChanged.connect(
             self.fileSelectionChanged
         )
@@ -181,6 +204,7 @@ class MainWindow(QtWidgets.QMainWindow):
             crosshair=self._config["canvas"]["crosshair"],
         )
         self.canvas.zoomRequest.connect(self.zoomRequest)
+        self.canvas.windowLevelRequest.connect(self.windowLevelRequest)
 
         scrollArea = QtWidgets.QScrollArea()
         scrollArea.setWidget(self.canvas)
@@ -255,6 +279,22 @@ class MainWindow(QtWidgets.QMainWindow):
             self.tr("Open prev (hold Ctl+Shift to copy labels)"),
             enabled=False,
         )
+        openNextFrame = action(
+            self.tr("Next &Frame"),
+            self.openNextFrame,
+            shortcuts["open_next_frame"],
+            "next",
+            self.tr("Open next frame of a multi-frame image"),
+            enabled=False,
+        )
+        openPrevFrame = action(
+            self.tr("Prev F&rame"),
+            self.openPrevFrame,
+            shortcuts["open_prev_frame"],
+            "prev",
+            self.tr("Open previous frame of a multi-frame image"),
+            enabled=False,
+        )
         save = action(
             self.tr("&Save"),
             self.saveFile,
@@ -511,6 +551,19 @@ class MainWindow(QtWidgets.QMainWindow):
             self.wc_value = self._config["ct_values"]["wc_value"]
             self.ww_value = self._config["ct_values"]["ww_value"]
             self.wf_value = self._config["ct_values"]["wf_value"]
+        # key=filename, value=utils.DicomPixels or encoded image data
+        self.imageCache = utils.LRUCache(
+            max_bytes=self._config["image_cache"]["max_memory_mb"] * 2**20,
+            on_evict=self.imageEvicted,
+        )
+        self.imagePrefetcher = utils.Prefetcher(
+            self.readImagePixels, self.imageCache
+        )
+        # key=filename, value=utils.DicomFile; only headers are kept
+        self.dicomFiles = utils.LRUCache(max_bytes=16, sizeof=lambda _: 1)
+        # key=filename, value=utils.DicomSeries the file is a slice of
+        self.dicomSeries = {}
+        self.currentSeries = None
         self.wcWidget = WcWidget()
         self.wcWidget.setValue(self.wc_value)
         self.wwWidget = WwWidget()
@@ -583,6 +636,24 @@ class MainWindow(QtWidgets.QMainWindow):
 
         wcwwActions = (self.wcWidget, self.wwWidget, windowcenter_inc, windowcenter_dec, windowwidth_inc, windowwidth_dec)
 
+        self.frameWidget = FrameWidget()
+        self.frameWidget.setEnabled(False)
+        self.frameWidget.valueChanged.connect(self.frameWidgetChanged)
+        frame_change = QtWidgets.QWidgetAction(self)
+        frame_change.setDefaultWidget(self.frameWidget)
+        frameActions = (self.frameWidget, openNextFrame, openPrevFrame)
+
+        # Window/level dragging re-renders at most once per display frame,
+        # always with the latest requested values.
+        refresh_rate = 60.0
+        screen = QtGui.QGuiApplication.primaryScreen()
+        if screen is not None and screen.refreshRate() > 0:
+            refresh_rate = screen.refreshRate()
+        self.windowLevelTimer = QtCore.QTimer(self)
+        self.windowLevelTimer.setSingleShot(True)
+        self.windowLevelTimer.setInterval(int(1000 / refresh_rate))
+        self.windowLevelTimer.timeout.connect(self.applyWindowLevel)
+
         keepPrevScale = action(
             self.tr("&Keep Previous Scale"),
             self.enableKeepPrevScale,
@@ -699,8 +770,11 @@ class MainWindow(QtWidgets.QMainWindow):
             brightnessContrast=brightnessContrast,
             zoomActions=zoomActions,
             wcwwActions=wcwwActions,
+            frameActions=frameActions,
             openNextImg=openNextImg,
             openPrevImg=openPrevImg,
+            openNextFrame=openNextFrame,
+            openPrevFrame=openPrevFrame,
             fileMenuActions=(open_, opendir, save, saveAs, close, quit),
             tool=(),
             # XXX: need to add some actions here to activate the shortcut
@@ -765,6 +839,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 open_,
                 openNextImg,
                 openPrevImg,
+                openNextFrame,
+                openPrevFrame,
                 opendir,
                 self.menus.recentFiles,
                 save,
@@ -844,6 +920,10 @@ class MainWindow(QtWidgets.QMainWindow):
             ww_change,
             windowwidth_dec,
             None,
+            openPrevFrame,
+            frame_change,
+            openNextFrame,
+            None,
             zoom,
             fitWidth,
         )
@@ -863,6 +943,12 @@ class MainWindow(QtWidgets.QMainWindow):
         # Application state.
         self.image = QtGui.QImage()
         self.imagePath = None
+        # windowed DICOM pixels backing self.image, encoded only when needed
+        self.imageArray = None
+        self._imageData = None
+        # frame shown of a multi-frame image, labeled in its own label file
+        self.frameIndex = 0
+        self.frameCount = 1
         self.recentFiles = []
         self.maxRecent = 7
         self.otherData = None
@@ -875,8 +961,18 @@ class MainWindow(QtWidgets.QMainWindow):
             Qt.Vertical: {},
         }  # key=filename, value=scroll_value
 
+        self.scanThread = None
+        self.fileIndex = None
+        if self._config["file_index"]:
+            try:
+                self.fileIndex = utils.FileIndex(
+                    osp.expanduser(self._config["file_index"])
+                )
+            except Exception as e:
+                logger.warning("Failed to open file index: {}".format(e))
         if filename is not None and osp.isdir(filename):
-            self.importDirImages(filename, load=False)
+            self.filename = None
+            self.importDirImages(filename)
         else:
             self.filename = filename
 
@@ -957,11 +1053,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
 
         if self._config["auto_save"] or self.actions.saveAuto.isChecked():
-            label_file = osp.splitext(self.imagePath)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            self.saveLabels(label_file)
+            self.autoSaveTimer.start()
             return
         self.dirty = True
         self.actions.save.setEnabled(True)
@@ -996,6 +1088,11 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.filename.endswith((".dcm", ".JL")):
             for w in self.actions.wcwwActions:
                 w.setEnabled(value)
+        for w in self.actions.frameActions:
+            w.setEnabled(value and self.frameCount > 1)
+        self.canvas.setWindowLevelEnabled(
+            value and self.imageArray is not None
+        )
         for action in self.actions.onLoadActive:
             action.setEnabled(value)
 
@@ -1006,10 +1103,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.statusBar().showMessage(message, delay)
 
     def resetState(self):
+        self.flushAutoSave()
         self.labelList.clear()
         self.filename = None
         self.imagePath = None
+        self.imageArray = None
         self.imageData = None
+        self.frameIndex = 0
+        self.frameCount = 1
         self.labelFile = None
         self.otherData = None
         self.canvas.resetState()
@@ -1192,26 +1293,25 @@ class MainWindow(QtWidgets.QMainWindow):
             self.uniqLabelList.setItemLabel(item, shape.label, rgb)
 
     def fileSearchChanged(self):
-        self.importDirImages(
-            self.lastOpenDir,
-            pattern=self.fileSearch.text(),
-            load=False,
-        )
+        self.fileSearchTimer.stop()
+        self.fileListWidget.setFilter(filename_filter(self.fileSearch.text()))
+        if self.filename in self.imageList:
+            # keep the current file selected without loading it again
+            self.fileListWidget.blockSignals(True)
+            self.fileListWidget.setCurrentRow(
+                self.imageList.index(self.filename)
+            )
+            self.fileListWidget.blockSignals(False)
 
     def fileSelectionChanged(self):
-        items = self.fileListWidget.selectedItems()
-        if not items:
+        filenames = self.fileListWidget.selectedFiles()
+        if not filenames:
             return
-        item = items[0]
 
         if not self.mayContinue():
             return
 
-        currIndex = self.imageList.index(str(item.text()))
-        if currIndex < len(self.imageList):
-            filename = self.imageList[currIndex]
-            if filename:
-                self.loadFile(filename)
+        self.loadFile(filenames[0])
 
     # React to canvas signals.
     def shapeSelectionChanged(self, selected_shapes):
@@ -1344,7 +1444,8 @@ class MainWindow(QtWidgets.QMainWindow):
             item.setCheckState(Qt.Checked if flag else Qt.Unchecked)
             self.flag_widget.addItem(item)
 
-    def saveLabels(self, filename):
+    def saveLabels(self, filename, background=False):
+        """Save the labels, or queue them to the auto save thread."""
         lf = LabelFile()
 
         def format_shape(s):
@@ -1356,7 +1457,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     group_id=s.group_id,
                     description=s.description,
                     shape_type=s.shape_type,
-                    flags=s.flags,
+                    flags=dict(s.flags) if s.flags else s.flags,
                 )
             )
             return data
@@ -1368,29 +1469,42 @@ class MainWindow(QtWidgets.QMainWindow):
             key = item.text()
             flag = item.checkState() == Qt.Checked
             flags[key] = flag
+        otherData = dict(self.otherData) if self.otherData else None
+        if self.frameCount > 1:
+            otherData = dict(otherData or {}, frameIndex=self.frameIndex)
         try:
             imagePath = osp.relpath(self.imagePath, osp.dirname(filename))
             imageData = self.imageData if self._config["store_data"] else None
+            imageStore = None
+            if imageData is not None and self._config["image_store"]:
+                imageStore = utils.ImageStore(
+                    osp.join(
+                        osp.dirname(filename),
+                        osp.expanduser(self._config["image_store"]),
+                    )
+                )
             if osp.dirname(filename) and not osp.exists(osp.dirname(filename)):
                 os.makedirs(osp.dirname(filename))
-            lf.save(
+            kwargs = dict(
                 filename=filename,
                 shapes=shapes,
                 imagePath=imagePath,
                 imageData=imageData,
                 imageHeight=self.image.height(),
                 imageWidth=self.image.width(),
-                otherData=self.otherData,
+                otherData=otherData,
                 flags=flags,
+                imageStore=imageStore,
             )
+            if background:
+                self.autoSaveFuture = self.autoSaveExecutor.submit(
+                    self.writeLabels, lf, kwargs, self.imagePath
+                )
+                return True
+            self.waitAutoSave()
+            self.labelFileHashes[filename] = lf.save(**kwargs)
             self.labelFile = lf
-            items = self.fileListWidget.findItems(
-                self.imagePath, Qt.MatchExactly
-            )
-            if len(items) > 0:
-                if len(items) != 1:
-                    raise RuntimeError("There are duplicate files.")
-                items[0].setCheckState(Qt.Checked)
+            self.fileListWidget.setChecked(self.imagePath, True)
             # disable allows next and previous image to proceed
             # self.filename = filename
             return True
@@ -1400,6 +1514,44 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return False
 
+    def writeLabels(self, lf, kwargs, imagePath):
+        # runs in the auto save thread
+        filename = kwargs["filename"]
+        try:
+            self.labelFileHashes[filename] = lf.save(
+                previousHash=self.labelFileHashes.get(filename), **kwargs
+            )
+        except LabelFileError as e:
+            logger.error("Failed to auto save {}: {}".format(filename, e))
+            return
+        self.labelsAutoSaved.emit(lf, imagePath)
+
+    def autoSaved(self, lf, imagePath):
+        # the label file may have been deleted since
+        if not osp.exists(lf.filename):
+            return
+        if imagePath == self.imagePath:
+            self.labelFile = lf
+        self.fileListWidget.setChecked(imagePath, True)
+
+    def autoSave(self):
+        if self.imagePath is None or self.image.isNull():
+            return
+        self.saveLabels(self.labelFileName(self.imagePath), background=True)
+
+    def flushAutoSave(self):
+        """Queue the pending auto save now, e.g. before changing images."""
+        if self.autoSaveTimer.isActive():
+            self.autoSaveTimer.stop()
+            self.autoSave()
+
+    def waitAutoSave(self):
+        """Flush the pending auto save and wait until it is written."""
+        self.flushAutoSave()
+        if self.autoSaveFuture is not None:
+            self.autoSaveFuture.result()
+            self.autoSaveFuture = None
+
     def duplicateSelectedShape(self):
         added_shapes = self.canvas.duplicateSelectedShapes()
         self.labelList.clearSelection()
@@ -1545,9 +1697,26 @@ class MainWindow(QtWidgets.QMainWindow):
             QtGui.QPixmap.fromImage(qimage), clear_shapes=False
         )
 
+    @property
+    def imageData(self):
+        if self._imageData is None and self.imageArray is not None:
+            self._imageData = utils.img_pil_to_data(
+                PIL.Image.fromarray(self.imageArray)
+            )
+        return self._imageData
+
+    @imageData.setter
+    def imageData(self, value):
+        self._imageData = value
+
+    def imagePil(self):
+        if self.imageArray is not None:
+            return PIL.Image.fromarray(self.imageArray)
+        return utils.img_data_to_pil(self.imageData)
+
     def brightnessContrast(self, value):
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            self.imagePil(),
             self.onNewBrightnessContrast,
             parent=self,
         )
@@ -1568,7 +1737,7 @@ class MainWindow(QtWidgets.QMainWindow):
         for item in self.labelList:
             item.setCheckState(Qt.Checked if value else Qt.Unchecked)
 
-    def loadFile(self, filename=None):
+    def loadFile(self, filename=None, frame=0):
         """Load the specified file, or the last opened file if None."""
         # changing fileListWidget loads file
         if filename in self.imageList and (
@@ -1593,15 +1762,25 @@ class MainWindow(QtWidgets.QMainWindow):
         self.status(
             str(self.tr("Loading %s...")) % osp.basename(str(filename))
         )
-        label_file = osp.splitext(filename)[0] + ".json"
-        if self.output_dir:
-            label_file_without_path = osp.basename(label_file)
-            label_file = osp.join(self.output_dir, label_file_without_path)
+        if filename.endswith((".dcm", ".JL")):
+            try:
+                self.frameCount = len(self.openDicom(filename))
+            except Exception:
+                pass  # reported as an invalid image below
+        self.frameIndex = min(max(frame, 0), self.frameCount - 1)
+        series = self.dicomSeries.get(filename)
+        if self.currentSeries is not None and series is not self.currentSeries:
+            self.releaseDicomSeries(self.currentSeries)
+        self.currentSeries = series
+        label_file = self.labelFileName(filename)
         if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
             label_file
         ):
             try:
                 self.labelFile = LabelFile(label_file)
+                if not filename.endswith((".dcm", ".JL")):
+                    # decoded on first access
+                    self.imageData = self.labelFile.imageData
             except LabelFileError as e:
                 self.errorMessage(
                     self.tr("Error opening file"),
@@ -1614,9 +1793,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.status(self.tr("Error reading %s") % label_file)
                 return False
             if filename.endswith((".dcm", ".JL")):
-                self.imageData = self.readCTDicom(filename, self.wc_value, self.ww_value,None)
-            else:
-                self.imageData = self.labelFile.imageData
+                self.imageArray = self.readCTDicom(
+                    filename, self.wc_value, self.ww_value, None
+                )
             self.imagePath = osp.join(
                 osp.dirname(label_file),
                 self.labelFile.imagePath,
@@ -1624,13 +1803,18 @@ class MainWindow(QtWidgets.QMainWindow):
             self.otherData = self.labelFile.otherData
         else:
             if filename.endswith((".dcm", ".JL")):
-                self.imageData = self.readCTDicom(filename, self.wc_value, self.ww_value,None)
+                self.imageArray = self.readCTDicom(
+                    filename, self.wc_value, self.ww_value, None
+                )
             else:
-                self.imageData = LabelFile.load_image_file(filename)
-            if self.imageData:
+                self.imageData = self.imagePrefetcher.get((filename, 0))
+            if self.imageArray is not None or self._imageData:
                 self.imagePath = filename
             self.labelFile = None
-        image = QtGui.QImage.fromData(self.imageData)
+        if self.imageArray is not None:
+            image = utils.img_arr_to_qimage(self.imageArray)
+        else:
+            image = QtGui.QImage.fromData(self.imageData)
 
         if image.isNull():
             formats = [
@@ -1650,6 +1834,10 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
         self.image = image
         self.filename = filename
+        self.frameWidget.blockSignals(True)
+        self.frameWidget.setFrameCount(self.frameCount)
+        self.frameWidget.setValue(self.frameIndex + 1)
+        self.frameWidget.blockSignals(False)
         if self._config["keep_prev"]:
             prev_shapes = self.canvas.shapes
         self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
@@ -1680,7 +1868,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
         # set brightness contrast values
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            self.imagePil(),
             self.onNewBrightnessContrast,
             parent=self,
         )
@@ -1707,8 +1895,36 @@ class MainWindow(QtWidgets.QMainWindow):
         self.toggleActions(True)
         self.canvas.setFocus()
         self.status(str(self.tr("Loaded %s")) % osp.basename(str(filename)))
+        self.prefetchImages()
         return True
 
+    def prefetchImages(self):
+        depth = self._config["image_cache"]["prefetch_depth"]
+        if not depth:
+            return
+        # neighbouring frames of a multi-frame image, else neighbouring files
+        if self.frameCount > 1:
+            count, currIndex = self.frameCount, self.frameIndex
+
+            def key(index):
+                return (self.filename, index)
+
+        elif self.filename in self.imageList:
+            count = len(self.imageList)
+            currIndex = self.imageList.index(self.filename)
+
+            def key(index):
+                return (self.imageList[index], 0)
+
+        else:
+            return
+        keys = []
+        for i in range(1, depth + 1):
+            for index in (currIndex + i, currIndex - i):
+                if 0 <= index < count:
+                    keys.append(key(index))
+        self.imagePrefetcher.prefetch(keys)
+
     def resizeEvent(self, event):
         if (
             self.canvas
@@ -1763,6 +1979,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings.setValue("recentFiles", self.recentFiles)
         # ask the use for where to save the labels
         # self.settings.setValue('window/geometry', self.saveGeometry())
+        if event.isAccepted():
+            self.waitAutoSave()
+            self.autoSaveExecutor.shutdown()
+            self.stopScan()
+            self.imagePrefetcher.shutdown()
 
     def dragEnterEvent(self, event):
         extensions = [
@@ -1802,7 +2023,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if len(self.imageList) <= 0:
             return
 
-        if self.filename is None:
+        if self.filename not in self.imageList:
             return
 
         currIndex = self.imageList.index(self.filename)
@@ -1827,7 +2048,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         filename = None
-        if self.filename is None:
+        if self.filename not in self.imageList:
             filename = self.imageList[0]
         else:
             currIndex = self.imageList.index(self.filename)
@@ -1842,6 +2063,29 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._config["keep_prev"] = keep_prev
 
+    def openPrevFrame(self, _value=False):
+        self.openFrame(self.frameIndex - 1)
+
+    def openNextFrame(self, _value=False):
+        self.openFrame(self.frameIndex + 1)
+
+    def frameWidgetChanged(self, value):
+        self.openFrame(value - 1)
+
+    def openFrame(self, frame):
+        if (
+            self.filename is None
+            or frame == self.frameIndex
+            or not 0 <= frame < self.frameCount
+        ):
+            return
+        if self.mayContinue():
+            self.loadFile(self.filename, frame=frame)
+        else:
+            self.frameWidget.blockSignals(True)
+            self.frameWidget.setValue(self.frameIndex + 1)
+            self.frameWidget.blockSignals(False)
+
     def openFile(self, _value=False):
         if not self.mayContinue():
             return
@@ -1895,15 +2139,10 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         self.statusBar().show()
 
-        current_filename = self.filename
-        self.importDirImages(self.lastOpenDir, load=False)
-
-        if current_filename in self.imageList:
-            # retain currently selected file
-            self.fileListWidget.setCurrentRow(
-                self.imageList.index(current_filename)
-            )
-            self.fileListWidget.repaint()
+        # retain currently selected file
+        self.importDirImages(
+            self.lastOpenDir, load=False, select=self.filename
+        )
 
     def saveFile(self, _value=False):
         assert not self.image.isNull(), "cannot save empty image"
@@ -1970,10 +2209,18 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def getLabelFile(self):
         if self.filename.lower().endswith(".json"):
-            label_file = self.filename
-        else:
-            label_file = osp.splitext(self.filename)[0] + ".json"
-
+            return self.filename
+        return self.labelFileName(self.filename)
+
+    def labelFileName(self, filename):
+        """Label file of an image, one per frame for multi-frame images."""
+        label_file = osp.splitext(filename)[0]
+        if self.frameCount > 1:
+            label_file += "_%04d" % self.frameIndex
+        label_file += ".json"
+        if self.output_dir:
+            label_file_without_path = osp.basename(label_file)
+            label_file = osp.join(self.output_dir, label_file_without_path)
         return label_file
 
     def deleteFile(self):
@@ -1986,13 +2233,14 @@ class MainWindow(QtWidgets.QMainWindow):
         if answer != mb.Yes:
             return
 
+        self.waitAutoSave()
         label_file = self.getLabelFile()
+        self.labelFileHashes.pop(label_file, None)
         if osp.exists(label_file):
             os.remove(label_file)
             logger.info("Label file is removed: {}".format(label_file))
 
-            item = self.fileListWidget.currentItem()
-            item.setCheckState(Qt.Unchecked)
+            self.fileListWidget.setChecked(self.filename, False)
 
             self.resetState()
 
@@ -2108,11 +2356,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @property
     def imageList(self):
-        lst = []
-        for i in range(self.fileListWidget.count()):
-            item = self.fileListWidget.item(i)
-            lst.append(item.text())
-        return lst
+        # a view of the file list, so "in" and index() take constant time
+        return self.fileListWidget.fileList()
 
     def importDroppedImageFiles(self, imageFiles):
         extensions = [
@@ -2121,24 +2366,16 @@ class MainWindow(QtWidgets.QMainWindow):
         ]
 
         self.filename = None
+        files = []
         for file in imageFiles:
             if file in self.imageList or not file.lower().endswith(
                 tuple(extensions)
             ):
                 continue
-            label_file = osp.splitext(file)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(file)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
-                label_file
-            ):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
+            files.append(
+                (file, utils.has_label_file(file, output_dir=self.output_dir))
+            )
+        self.fileListWidget.addFiles(files)
 
         if len(self.imageList) > 1:
             self.actions.openNextImg.setEnabled(True)
@@ -2146,7 +2383,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.openNextImg()
 
-    def importDirImages(self, dirpath, pattern=None, load=True):
+    def importDirImages(self, dirpath, load=True, select=None):
         self.actions.openNextImg.setEnabled(True)
         self.actions.openPrevImg.setEnabled(True)
 
@@ -2154,105 +2391,141 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         self.lastOpenDir = dirpath
-        self.filename = None
+        # the current image stays open, and savable, until a batch arrives
         self.fileListWidget.clear()
-        for filename in self.scanAllImages(dirpath):
-            if pattern and pattern not in filename:
-                continue
-            label_file = osp.splitext(filename)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(filename)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
-                label_file
-            ):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
-        self.openNextImg(load=load)
+        self.stopScan()
+        self.resetDicomSeries()
+        # the list is filled in batches while the tree is scanned
+        self.scanThread = utils.ScanThread(
+            dirpath,
+            self.imageExtensions(),
+            output_dir=self.output_dir,
+            index=self.fileIndex,
+            parent=self,
+        )
+        self.scanThread.batchReady.connect(
+            functools.partial(
+                self.importImageBatch,
+                scanThread=self.scanThread,
+                load=load,
+                select=select,
+            )
+        )
+        self.scanThread.start()
+
+    def importImageBatch(
+        self, images, series, scanThread=None, load=True, select=None
+    ):
+        if scanThread is not self.scanThread:
+            return  # batch of a cancelled scan
+        for s in series:
+            for filename in s.filenames:
+                self.dicomSeries[filename] = s
+        self.fileListWidget.addFiles(images)
+        if load and self.fileListWidget.count() == len(images):
+            # first batch of the scan
+            self.filename = None
+            self.openNextImg()
+        if select is not None and any(f == select for f, _ in images):
+            if select in self.imageList:
+                self.fileListWidget.setCurrentRow(
+                    self.imageList.index(select)
+                )
+                self.fileListWidget.repaint()
 
-    def scanAllImages(self, folderPath):
+    def stopScan(self):
+        if self.scanThread is not None:
+            self.scanThread.stop()
+            self.scanThread.wait()
+            self.scanThread = None
+
+    def imageExtensions(self):
         extensions = [
             ".%s" % fmt.data().decode().lower()
             for fmt in QtGui.QImageReader.supportedImageFormats()
         ]
         extensions.append('.dcm')
         extensions.append('.JL')
-
-        images = []
-        for root, dirs, files in os.walk(folderPath):
-            for file in files:
-                if file.lower().endswith(tuple(extensions)):
-                    relativePath = osp.join(root, file)
-                    images.append(relativePath)
-        images = natsort.os_sorted(images)
-        return images
-    
+        return extensions
+
+    def resetDicomSeries(self):
+        for series in set(self.dicomSeries.values()):
+            self.releaseDicomSeries(series)
+        self.dicomSeries = {}
+        self.currentSeries = None
+
+    def releaseDicomSeries(self, series):
+        # also drops the slices of prefetches still running
+        self.imagePrefetcher.discard([(f, 0) for f in series.filenames])
+        series.release()
+
+    def imageEvicted(self, key, value):
+        # cached slices are views into the volume of their series, which
+        # is dropped with the last of them to stay within the cache budget
+        series = self.dicomSeries.get(key[0])
+        if series is None:
+            return
+        if not any((f, 0) in self.imageCache for f in series.filenames):
+            series.release()
+
+    def openDicom(self, filename):
+        dicom = self.dicomFiles.get(filename)
+        if dicom is None:
+            dicom = utils.DicomFile(filename)
+            self.dicomFiles.put(filename, dicom)
+        return dicom
+
+    def readImagePixels(self, key):
+        # called from prefetch threads, so it must not touch the GUI
+        filename, frame = key
+        series = self.dicomSeries.get(filename)
+        if series is not None:
+            return series.slice(series.index(filename))
+        if filename.endswith((".dcm", ".JL")):
+            return self.openDicom(filename).frame(frame)
+        return LabelFile.load_image_file(filename)
 
     def readCTDicom(self, filename, wc, ww, default=None):
         try:
-            data_dicom = pydicom.dcmread(filename)
-            
-            img = np.array(data_dicom.pixel_array).astype('float32')
-            icpt = 0
-            if "RescaleIntercept" in data_dicom:
-                icpt = int(data_dicom.RescaleIntercept)
-
-            img = self.precess_img(img, wc, ww, icpt)
-            img = self.normalize_img(img)
-            img = np.array(img * 255, dtype=np.uint8)
-            image_pil = PIL.Image.fromarray(img)
-
-            # wc = data_dicom.WindowCenter
-            # ww = data_dicom.WindowWidth
-            # ri = data_dicom.RescaleIntercept
-
-            # return img
+            pixels = self.imagePrefetcher.get((filename, self.frameIndex))
+            return pixels.window(wc, ww, self.wf_value)
         except Exception:
             return default
-        
-        with io.BytesIO() as f:
-            ext = osp.splitext(filename)[1].lower()
-            if PY2 and QT4:
-                format = "PNG"
-            elif ext in [".jpg", ".jpeg"]:
-                format = "JPEG"
-            else:
-                format = "PNG"
-            image_pil.save(f, format=format)
-            f.seek(0)
-            return f.read()
 
+    def redrawCTImage(self):
+        imageArray = self.readCTDicom(
+            self.filename, self.wc_value, self.ww_value, None
+        )
+        if imageArray is None:
+            return
+        self.imageArray = imageArray
+        self.imageData = None
+        self.image = utils.img_arr_to_qimage(imageArray)
+        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(self.image), False)
 
-        
-    def normalize_img(self, img):
-        min_, max_ = float(np.min(img)), float(np.max(img))
-        return (img - min_) / (max_ - min_)
+    def windowLevelRequest(self, dx, dy):
+        # horizontal drag changes the width, vertical drag the center
+        self.wc_value = min(
+            max(self.wc_value + dy, self.wcWidget.minimum()),
+            self.wcWidget.maximum(),
+        )
+        self.ww_value = min(
+            max(self.ww_value + dx, 1), self.wwWidget.maximum()
+        )
+        if not self.windowLevelTimer.isActive():
+            self.windowLevelTimer.start()
 
+    def applyWindowLevel(self):
+        self.redrawCTImage()
+        self.wcWidget.setValue(self.wc_value)
+        self.wwWidget.setValue(self.ww_value)
 
-    def precess_img(self, img, wc, ww, icpt):
-        img = img + icpt
-        img[img > self.wf_value] = 0
-        img = np.clip(img, wc - ww, wc + ww)
-        return img
-    
     def setWC(self, adjustValue=10):
         self.wc_value = self.wc_value + adjustValue
-        finame = self.filename
-        self.imageData = self.readCTDicom(finame, self.wc_value, self.ww_value, None)
-        image = QtGui.QImage.fromData(self.imageData)
-        self.image = image
-        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image), False)
+        self.redrawCTImage()
         self.wcWidget.setValue(self.wc_value)
 
     def setWW(self, adjustValue=10):
         self.ww_value = self.ww_value + adjustValue
-        finame = self.filename
-        self.imageData = self.readCTDicom(finame, self.wc_value, self.ww_value, None)
-        image = QtGui.QImage.fromData(self.imageData)
-        self.image = image
-        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image), False)
+        self.redrawCTImage()
         self.wwWidget.setValue(self.ww_value)
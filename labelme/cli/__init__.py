@@ -1,6 +1,8 @@
 # flake8: noqa
 
+from . import convert
 from . import draw_json
 from . import draw_label_png
+from . import export
 from . import json_to_dataset
 from . import on_docker
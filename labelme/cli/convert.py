@@ -0,0 +1,53 @@
+import argparse
+import functools
+import os.path as osp
+import sys
+
+from labelme import convert
+
+
+FORMATS = {
+    "coco": convert.coco.convert,
+    "voc": convert.voc.convert_segmentation,
+    "voc_instance": functools.partial(
+        convert.voc.convert_segmentation, instance=True
+    ),
+    "voc_bbox": convert.voc.convert_bbox,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("format", choices=sorted(FORMATS), help="format")
+    parser.add_argument("input_dir", help="input annotated directory")
+    parser.add_argument("output_dir", help="output dataset directory")
+    parser.add_argument("--labels", help="labels file", required=True)
+    parser.add_argument(
+        "--noviz", help="no visualization", action="store_true"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="number of worker processes, all CPUs if not given",
+    )
+    args = parser.parse_args()
+
+    if osp.exists(args.output_dir):
+        print("Output directory already exists:", args.output_dir)
+        sys.exit(1)
+
+    FORMATS[args.format](
+        args.input_dir,
+        args.output_dir,
+        args.labels,
+        noviz=args.noviz,
+        jobs=args.jobs,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os.path as osp
+import sys
+
+from labelme.convert import dicom
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export DICOM annotations with the original pixel "
+        "values, as int16 and label NPY files.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="directory tree of label files")
+    parser.add_argument("output_dir", help="output dataset directory")
+    parser.add_argument("--labels", help="labels file", required=True)
+    parser.add_argument(
+        "--volume",
+        action="store_true",
+        help="export each series as one image and one label volume",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="number of worker processes, all CPUs if not given",
+    )
+    args = parser.parse_args()
+
+    if osp.exists(args.output_dir):
+        print("Output directory already exists:", args.output_dir)
+        sys.exit(1)
+
+    if args.volume:
+        export = dicom.export_volumes
+    else:
+        export = dicom.export
+    export(args.input_dir, args.output_dir, args.labels, jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,8 @@ def main():
     imageData = data.get("imageData")
 
     if not imageData:
-        imagePath = os.path.join(os.path.dirname(json_file), data["imagePath"])
+        imagePath = data.get("imageDataRef") or data["imagePath"]
+        imagePath = os.path.join(os.path.dirname(json_file), imagePath)
         with open(imagePath, "rb") as f:
             imageData = f.read()
             imageData = base64.b64encode(imageData).decode("utf-8")
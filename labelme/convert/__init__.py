@@ -0,0 +1,8 @@
+# flake8: noqa
+
+from .pipeline import find_label_files
+from .pipeline import imap
+
+from . import coco
+from . import voc
+from . import dicom
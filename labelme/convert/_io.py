@@ -0,0 +1,10 @@
+import imgviz
+
+
+def save_jpeg(filename, image_data, img):
+    """Save an image as JPEG, copying ``image_data`` if it already is one."""
+    if image_data[:3] == b"\xff\xd8\xff":
+        with open(filename, "wb") as f:
+            f.write(image_data)
+    else:
+        imgviz.io.imsave(filename, img)
@@ -0,0 +1,210 @@
+import collections
+import datetime
+import functools
+import json
+import os
+import os.path as osp
+
+import imgviz
+import numpy as np
+
+from labelme.label_file import LabelFile
+from labelme import utils
+
+from ._io import save_jpeg
+from .pipeline import find_label_files
+from .pipeline import imap
+
+
+def shape_to_segmentation(points, shape_type):
+    """Return the flat COCO polygon of a shape."""
+    if shape_type == "rectangle":
+        (x1, y1), (x2, y2) = points
+        x1, x2 = sorted([x1, x2])
+        y1, y2 = sorted([y1, y2])
+        return [x1, y1, x2, y1, x2, y2, x1, y2]
+    if shape_type == "circle":
+        (x1, y1), (x2, y2) = points
+        r = np.linalg.norm([x2 - x1, y2 - y1])
+        # r(1-cos(a/2))<x, a=2*pi/N => N>pi/arccos(1-x/r)
+        # x: tolerance of the gap between the arc and the line segment
+        n_points_circle = max(int(np.pi / np.arccos(1 - 1 / r)), 12)
+        i = np.arange(n_points_circle)
+        x = x1 + r * np.sin(2 * np.pi / n_points_circle * i)
+        y = y1 + r * np.cos(2 * np.pi / n_points_circle * i)
+        return np.stack((x, y), axis=1).flatten().tolist()
+    return np.asarray(points).flatten().tolist()
+
+
+def convert_file(filename, output_dir, class_name_to_id, noviz=False):
+    """Convert one label file, saving its image and visualization.
+
+    Return the COCO image and annotations of the file without their ids,
+    which are given when the results of all the files are merged.
+    """
+    label_file = LabelFile(filename=filename)
+
+    base = osp.splitext(osp.basename(filename))[0]
+    out_img_file = osp.join(output_dir, "JPEGImages", base + ".jpg")
+
+    img = utils.img_data_to_arr(label_file.imageData)
+    save_jpeg(out_img_file, label_file.imageData, img)
+    image = dict(
+        license=0,
+        url=None,
+        file_name=osp.relpath(out_img_file, output_dir),
+        height=img.shape[0],
+        width=img.shape[1],
+        date_captured=None,
+    )
+
+    masks = {}  # for area
+    segmentations = collections.defaultdict(list)  # for segmentation
+    for i, shape in enumerate(label_file.shapes):
+        points = shape["points"]
+        label = shape["label"]
+        group_id = shape.get("group_id")
+        shape_type = shape.get("shape_type", "polygon")
+        mask = utils.RLEMask.from_shape(img.shape[:2], points, shape_type)
+
+        if group_id is None:
+            # a shape without group is an instance of its own
+            instance = (label, None, i)
+        else:
+            instance = (label, group_id)
+
+        if instance in masks:
+            masks[instance] = masks[instance] | mask
+        else:
+            masks[instance] = mask
+        segmentations[instance].append(
+            shape_to_segmentation(points, shape_type)
+        )
+
+    annotations = []
+    for instance, mask in masks.items():
+        cls_name = instance[0]
+        if cls_name not in class_name_to_id:
+            continue
+        y1, x1, y2, x2 = mask.bbox
+        annotations.append(
+            dict(
+                category_id=class_name_to_id[cls_name],
+                segmentation=segmentations[instance],
+                area=float(mask.area),
+                bbox=[float(x1), float(y1), float(x2 - x1), float(y2 - y1)],
+                iscrowd=0,
+            )
+        )
+
+    if not noviz:
+        viz = img
+        instances = [
+            (class_name_to_id[instance[0]], instance[0], mask.decode())
+            for instance, mask in masks.items()
+            if instance[0] in class_name_to_id
+        ]
+        if instances:
+            labels, captions, viz_masks = zip(*instances)
+            viz = imgviz.instances2rgb(
+                image=img,
+                labels=labels,
+                masks=viz_masks,
+                captions=captions,
+                font_size=15,
+                line_width=2,
+            )
+        out_viz_file = osp.join(output_dir, "Visualization", base + ".jpg")
+        imgviz.io.imsave(out_viz_file, viz)
+
+    return image, annotations
+
+
+def convert(input_dir, output_dir, labels_file, noviz=False, jobs=1):
+    """Convert a directory of label files into a COCO dataset.
+
+    Files are converted in ``jobs`` worker processes. Image ids follow the
+    sorted label filenames and annotation ids follow the image ids, so the
+    output does not depend on the number of jobs.
+    """
+    os.makedirs(output_dir)
+    os.makedirs(osp.join(output_dir, "JPEGImages"))
+    if not noviz:
+        os.makedirs(osp.join(output_dir, "Visualization"))
+    print("Creating dataset:", output_dir)
+
+    now = datetime.datetime.now()
+
+    data = dict(
+        info=dict(
+            description=None,
+            url=None,
+            version=None,
+            year=now.year,
+            contributor=None,
+            date_created=now.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        ),
+        licenses=[
+            dict(
+                url=None,
+                id=0,
+                name=None,
+            )
+        ],
+        images=[
+            # license, url, file_name, height, width, date_captured, id
+        ],
+        type="instances",
+        annotations=[
+            # segmentation, area, iscrowd, image_id, bbox, category_id, id
+        ],
+        categories=[
+            # supercategory, id, name
+        ],
+    )
+
+    class_name_to_id = {}
+    with open(labels_file) as f:
+        lines = f.readlines()
+    for i, line in enumerate(lines):
+        class_id = i - 1  # starts with -1
+        class_name = line.strip()
+        if class_id == -1:
+            assert class_name == "__ignore__"
+            continue
+        class_name_to_id[class_name] = class_id
+        data["categories"].append(
+            dict(
+                supercategory=None,
+                id=class_id,
+                name=class_name,
+            )
+        )
+
+    label_files = find_label_files(input_dir)
+    worker = functools.partial(
+        convert_file,
+        output_dir=output_dir,
+        class_name_to_id=class_name_to_id,
+        noviz=noviz,
+    )
+    results = imap(worker, label_files, jobs=jobs)
+    for image_id, (filename, (image, annotations)) in enumerate(
+        zip(label_files, results)
+    ):
+        print("Generated dataset from:", filename)
+        image["id"] = image_id
+        data["images"].append(image)
+        for annotation in annotations:
+            data["annotations"].append(
+                dict(
+                    id=len(data["annotations"]),
+                    image_id=image_id,
+                    **annotation
+                )
+            )
+
+    out_ann_file = osp.join(output_dir, "annotations.json")
+    with open(out_ann_file, "w") as f:
+        json.dump(data, f)
+    return out_ann_file
@@ -0,0 +1,302 @@
+import functools
+import json
+import os
+import os.path as osp
+
+import numpy as np
+
+from labelme.label_file import LabelFile
+from labelme import utils
+
+from .pipeline import find_label_files
+from .pipeline import imap
+from .voc import load_class_names
+
+
+def label_dtype(class_name_to_id):
+    """Return the smallest unsigned dtype for the label values.
+
+    The largest value of the dtype is kept for ``__ignore__`` (-1), as 255
+    is in the label PNG files.
+    """
+    if max(class_name_to_id.values()) < 255:
+        return np.dtype(np.uint8)
+    return np.dtype(np.uint16)
+
+
+def to_label_array(lbl, dtype):
+    """Convert a class label of ``shapes_to_label`` to ``dtype``."""
+    return np.where(lbl == -1, np.iinfo(dtype).max, lbl).astype(dtype)
+
+
+def dicom_image_path(label_file, filename):
+    """Return the DICOM file of a label file, or None if it has another."""
+    if not label_file.imagePath.endswith(utils.DICOM_EXTENSIONS):
+        return None
+    return osp.join(osp.dirname(filename), label_file.imagePath)
+
+
+def _header_metadata(dataset):
+    metadata = {}
+    for key in [
+        "PixelSpacing",
+        "SliceThickness",
+        "ImagePositionPatient",
+        "ImageOrientationPatient",
+        "SeriesInstanceUID",
+        "SOPInstanceUID",
+    ]:
+        value = dataset.get(key)
+        if value is None:
+            continue
+        if key.endswith("UID"):
+            metadata[key] = str(value)
+        elif isinstance(value, float):
+            metadata[key] = float(value)
+        else:
+            metadata[key] = [float(v) for v in value]
+    return metadata
+
+
+def export_file(filename, input_dir, output_dir, class_name_to_id):
+    """Export the DICOM slice of a label file at full bit depth.
+
+    The slice is read again from the DICOM file, not from the 8-bit image
+    in the label file, and saved as int16 rescaled values next to its
+    labels, which are drawn on the native pixel grid. Return the path of
+    the exported files without extension, or None if the label file is
+    not of a DICOM file.
+    """
+    label_file = LabelFile(filename=filename)
+    image_path = dicom_image_path(label_file, filename)
+    if image_path is None:
+        return None
+
+    frame = (label_file.otherData or {}).get("frameIndex", 0)
+    dicom = utils.DicomFile(image_path)
+    pixels = dicom.frame(frame)
+    hu = pixels.to_hu()
+
+    cls, _ = utils.shapes_to_label(
+        img_shape=hu.shape,
+        shapes=label_file.shapes,
+        label_name_to_value=class_name_to_id,
+    )
+
+    base = osp.splitext(osp.relpath(filename, input_dir))[0]
+    for name, array in [
+        ("images", hu),
+        ("labels", to_label_array(cls, label_dtype(class_name_to_id))),
+    ]:
+        out_file = osp.join(output_dir, name, base + ".npy")
+        os.makedirs(osp.dirname(out_file), exist_ok=True)
+        np.save(out_file, array)
+
+    metadata = _header_metadata(dicom.dataset)
+    metadata.update(
+        imagePath=osp.relpath(image_path, output_dir),
+        frameIndex=frame,
+        shape=list(hu.shape),
+        slope=pixels.slope,
+        intercept=pixels.intercept,
+    )
+    out_file = osp.join(output_dir, "metadata", base + ".json")
+    os.makedirs(osp.dirname(out_file), exist_ok=True)
+    with open(out_file, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return base
+
+
+def export(input_dir, output_dir, labels_file, jobs=1):
+    """Export the DICOM label files under a directory tree.
+
+    For each label file of a DICOM image, ``images/<name>.npy`` holds the
+    int16 rescaled values, ``labels/<name>.npy`` the class labels and
+    ``metadata/<name>.json`` the pixel spacing and position of the slice,
+    where ``<name>`` is the path of the label file relative to
+    ``input_dir``. Files are exported in ``jobs`` worker processes, which
+    write the arrays themselves so that only one slice per task is held in
+    memory.
+    """
+    # listed first, as the output directory may be under input_dir
+    label_files = find_label_files(input_dir, recursive=True)
+    os.makedirs(output_dir)
+    print("Creating dataset:", output_dir)
+
+    class_names, class_name_to_id = load_class_names(labels_file)
+    with open(osp.join(output_dir, "class_names.txt"), "w") as f:
+        f.writelines("\n".join(class_names))
+
+    worker = functools.partial(
+        export_file,
+        input_dir=input_dir,
+        output_dir=output_dir,
+        class_name_to_id=class_name_to_id,
+    )
+    for filename, base in zip(label_files, imap(worker, label_files, jobs)):
+        if base is None:
+            print("Skipping non-DICOM label file:", filename)
+        else:
+            print("Exported:", filename)
+
+
+def _label_slice(filename):
+    label_file = LabelFile(filename=filename)
+    image_path = dicom_image_path(label_file, filename)
+    if image_path is None:
+        return None
+    frame = (label_file.otherData or {}).get("frameIndex", 0)
+    return osp.normpath(image_path), frame
+
+
+def find_volumes(input_dir, label_files, jobs=1):
+    """Group the DICOM slices of label files into volumes.
+
+    A volume is a DICOM series, with all the slices of the series in the
+    directories of the labeled files, or a multi-frame file. Return a list
+    of ``(name, slices, labels, info)``, where ``slices`` are the
+    ``(filename, frame)`` of the volume in order, ``labels`` maps the
+    label files to their slice index and ``info`` is the ``SliceInfo`` of
+    the first slice.
+    """
+    refs = {}
+    labeled = set()
+    for filename, ref in zip(
+        label_files, imap(_label_slice, label_files, jobs)
+    ):
+        if ref is None:
+            print("Skipping non-DICOM label file:", filename)
+        elif ref in labeled:
+            print("Skipping label file of a labeled slice:", filename)
+        else:
+            refs[filename] = ref
+            labeled.add(ref)
+
+    dirnames = sorted(
+        {osp.dirname(image_path) for image_path, _ in refs.values()}
+    )
+    dicom_files = [
+        osp.join(dirname, name)
+        for dirname in dirnames
+        for name in sorted(os.listdir(dirname))
+        if name.endswith(utils.DICOM_EXTENSIONS)
+    ]
+    infos = dict(
+        zip(dicom_files, imap(utils.read_slice_info, dicom_files, jobs))
+    )
+    series, others = utils.group_dicom_series(infos.items())
+
+    volumes = []
+    for filenames in [s.filenames for s in series] + [[f] for f in others]:
+        info = infos[filenames[0]]
+        if info is None or not info.rows or not info.columns:
+            continue
+        if len(filenames) == 1:
+            slices = [(filenames[0], i) for i in range(info.n_frames)]
+            name = osp.splitext(osp.relpath(filenames[0], input_dir))[0]
+        else:
+            slices = [(f, 0) for f in filenames]
+            name = osp.join(
+                osp.relpath(osp.dirname(filenames[0]), input_dir),
+                info.series_uid,
+            )
+        index = {ref: i for i, ref in enumerate(slices)}
+        labels = {
+            filename: index[ref]
+            for filename, ref in refs.items()
+            if ref in index
+        }
+        if labels:
+            volumes.append((osp.normpath(name), slices, labels, info))
+    return volumes
+
+
+def _write_image_slice(item):
+    out_file, index, (filename, frame) = item
+    volume = np.lib.format.open_memmap(out_file, mode="r+")
+    volume[index] = utils.read_dicom_pixels(filename, frame).to_hu()
+    volume.flush()
+
+
+def _write_label_slice(item, class_name_to_id):
+    out_file, index, filename = item
+    label_file = LabelFile(filename=filename)
+    volume = np.lib.format.open_memmap(out_file, mode="r+")
+    cls, _ = utils.shapes_to_label(
+        img_shape=volume.shape[1:],
+        shapes=label_file.shapes,
+        label_name_to_value=class_name_to_id,
+    )
+    volume[index] = to_label_array(cls, volume.dtype)
+    volume.flush()
+
+
+def export_volumes(input_dir, output_dir, labels_file, jobs=1):
+    """Export the DICOM label files under a directory tree as volumes.
+
+    For each volume of ``find_volumes``, ``volumes/<name>_image.npy``
+    holds the int16 rescaled values of all its slices and
+    ``volumes/<name>_label.npy`` the class labels, in slice order, with
+    unlabeled slices left as background. ``volumes/<name>.json`` lists
+    the slices. The NPY files are created with
+    ``np.lib.format.open_memmap`` and the worker processes write one slice
+    at a time into them, so a volume is never held in memory.
+    """
+    label_files = find_label_files(input_dir, recursive=True)
+    os.makedirs(output_dir)
+    print("Creating dataset:", output_dir)
+
+    class_names, class_name_to_id = load_class_names(labels_file)
+    with open(osp.join(output_dir, "class_names.txt"), "w") as f:
+        f.writelines("\n".join(class_names))
+    dtype = label_dtype(class_name_to_id)
+
+    image_items = []
+    label_items = []
+    for name, slices, labels, info in find_volumes(
+        input_dir, label_files, jobs=jobs
+    ):
+        base = osp.join(output_dir, "volumes", name)
+        os.makedirs(osp.dirname(base), exist_ok=True)
+        shape = (len(slices), info.rows, info.columns)
+        for suffix, volume_dtype in [("_image", np.int16), ("_label", dtype)]:
+            # the header is written and the data left to the workers
+            np.lib.format.open_memmap(
+                base + suffix + ".npy",
+                mode="w+",
+                dtype=volume_dtype,
+                shape=shape,
+            ).flush()
+        image_items.extend(
+            (base + "_image.npy", index, ref)
+            for index, ref in enumerate(slices)
+        )
+        label_items.extend(
+            (base + "_label.npy", index, filename)
+            for filename, index in sorted(labels.items())
+        )
+
+        metadata = _header_metadata(utils.read_dicom_header(slices[0][0]))
+        metadata.pop("SOPInstanceUID", None)
+        metadata.update(
+            shape=list(shape),
+            slices=[
+                [osp.relpath(filename, output_dir), frame]
+                for filename, frame in slices
+            ],
+            labels={
+                osp.relpath(filename, output_dir): index
+                for filename, index in sorted(labels.items())
+            },
+        )
+        with open(base + ".json", "w") as f:
+            json.dump(metadata, f, indent=2)
+        print("Exporting volume:", name, shape)
+
+    for _ in imap(_write_image_slice, image_items, jobs):
+        pass
+    worker = functools.partial(
+        _write_label_slice, class_name_to_id=class_name_to_id
+    )
+    for _ in imap(worker, label_items, jobs):
+        pass
@@ -0,0 +1,45 @@
+import collections
+import concurrent.futures
+import glob
+import os
+import os.path as osp
+
+
+def find_label_files(input_dir, recursive=False):
+    """Return the label files in a directory, sorted by name.
+
+    Sorting makes image and annotation ids independent of the order in
+    which the file system lists the directory. With ``recursive``, the
+    files of all the subdirectories are found as well.
+    """
+    if recursive:
+        pattern = osp.join(input_dir, "**", "*.json")
+    else:
+        pattern = osp.join(input_dir, "*.json")
+    return sorted(glob.glob(pattern, recursive=recursive))
+
+
+def imap(func, items, jobs=1):
+    """Yield ``func(item)`` for each item, in order, using worker processes.
+
+    ``func`` and the items must be picklable, e.g. a module-level function
+    or a ``functools.partial`` of one. ``jobs`` of None uses all the CPUs,
+    and 1 runs everything in this process. At most two tasks per worker
+    are queued ahead of the results consumed, so that memory stays bounded
+    however many items there are.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
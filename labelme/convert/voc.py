@@ -0,0 +1,250 @@
+import functools
+import os
+import os.path as osp
+
+import imgviz
+import numpy as np
+
+from labelme.label_file import LabelFile
+from labelme import utils
+
+from ._io import save_jpeg
+from .pipeline import find_label_files
+from .pipeline import imap
+
+try:
+    import lxml.builder
+    import lxml.etree
+except ImportError:
+    lxml = None
+
+
+def load_class_names(labels_file):
+    """Read a labels file of ``__ignore__``, ``_background_`` and classes.
+
+    Return the class names, from ``_background_`` on, and the label value
+    of each name, ``__ignore__`` being -1.
+    """
+    class_names = []
+    class_name_to_id = {}
+    with open(labels_file) as f:
+        lines = f.readlines()
+    for i, line in enumerate(lines):
+        class_id = i - 1  # starts with -1
+        class_name = line.strip()
+        class_name_to_id[class_name] = class_id
+        if class_id == -1:
+            assert class_name == "__ignore__"
+            continue
+        elif class_id == 0:
+            assert class_name == "_background_"
+        class_names.append(class_name)
+    return tuple(class_names), class_name_to_id
+
+
+def _save_class_names(output_dir, class_names):
+    print("class_names:", class_names)
+    out_class_names_file = osp.join(output_dir, "class_names.txt")
+    with open(out_class_names_file, "w") as f:
+        f.writelines("\n".join(class_names))
+    print("Saved class_names:", out_class_names_file)
+
+
+def _save_label(output_dir, name, base, lbl, img, label_names, noviz):
+    utils.lblsave(osp.join(output_dir, name + "PNG", base + ".png"), lbl)
+    np.save(osp.join(output_dir, name, base + ".npy"), lbl)
+    if not noviz:
+        viz = imgviz.label2rgb(
+            lbl,
+            imgviz.rgb2gray(img),
+            label_names=label_names,
+            font_size=15,
+            loc="rb",
+        )
+        imgviz.io.imsave(
+            osp.join(output_dir, name + "Visualization", base + ".jpg"), viz
+        )
+
+
+def convert_segmentation_file(
+    filename,
+    output_dir,
+    class_names,
+    class_name_to_id,
+    instance=False,
+    noviz=False,
+):
+    """Save the image and the class, and instance, labels of a file."""
+    label_file = LabelFile(filename=filename)
+    base = osp.splitext(osp.basename(filename))[0]
+
+    img = utils.img_data_to_arr(label_file.imageData)
+    save_jpeg(
+        osp.join(output_dir, "JPEGImages", base + ".jpg"),
+        label_file.imageData,
+        img,
+    )
+
+    cls, ins = utils.shapes_to_label(
+        img_shape=img.shape,
+        shapes=label_file.shapes,
+        label_name_to_value=class_name_to_id,
+    )
+    _save_label(
+        output_dir, "SegmentationClass", base, cls, img, class_names, noviz
+    )
+    if instance:
+        ins[cls == -1] = 0  # ignore it.
+        instance_names = [str(i) for i in range(ins.max() + 1)]
+        _save_label(
+            output_dir,
+            "SegmentationObject",
+            base,
+            ins,
+            img,
+            instance_names,
+            noviz,
+        )
+
+
+def convert_segmentation(
+    input_dir, output_dir, labels_file, instance=False, noviz=False, jobs=1
+):
+    """Convert a directory of label files into a VOC segmentation dataset.
+
+    The class labels, and the instance labels if ``instance`` is true, are
+    saved as NPY and PNG files, and files are converted in ``jobs`` worker
+    processes.
+    """
+    names = ["SegmentationClass"]
+    if instance:
+        names.append("SegmentationObject")
+    os.makedirs(output_dir)
+    os.makedirs(osp.join(output_dir, "JPEGImages"))
+    for name in names:
+        os.makedirs(osp.join(output_dir, name))
+        os.makedirs(osp.join(output_dir, name + "PNG"))
+        if not noviz:
+            os.makedirs(osp.join(output_dir, name + "Visualization"))
+    print("Creating dataset:", output_dir)
+
+    class_names, class_name_to_id = load_class_names(labels_file)
+    _save_class_names(output_dir, class_names)
+
+    label_files = find_label_files(input_dir)
+    worker = functools.partial(
+        convert_segmentation_file,
+        output_dir=output_dir,
+        class_names=class_names,
+        class_name_to_id=class_name_to_id,
+        instance=instance,
+        noviz=noviz,
+    )
+    for filename, _ in zip(label_files, imap(worker, label_files, jobs)):
+        print("Generated dataset from:", filename)
+
+
+def convert_bbox_file(filename, output_dir, class_names, noviz=False):
+    """Save the image and the rectangles of a file as VOC XML."""
+    label_file = LabelFile(filename=filename)
+    base = osp.splitext(osp.basename(filename))[0]
+
+    img = utils.img_data_to_arr(label_file.imageData)
+    save_jpeg(
+        osp.join(output_dir, "JPEGImages", base + ".jpg"),
+        label_file.imageData,
+        img,
+    )
+
+    maker = lxml.builder.ElementMaker()
+    xml = maker.annotation(
+        maker.folder(),
+        maker.filename(base + ".jpg"),
+        maker.database(),  # e.g., The VOC2007 Database
+        maker.annotation(),  # e.g., Pascal VOC2007
+        maker.image(),  # e.g., flickr
+        maker.size(
+            maker.height(str(img.shape[0])),
+            maker.width(str(img.shape[1])),
+            maker.depth(str(img.shape[2])),
+        ),
+        maker.segmented(),
+    )
+
+    bboxes = []
+    labels = []
+    for shape in label_file.shapes:
+        if shape["shape_type"] != "rectangle":
+            print(
+                "Skipping shape: label={label}, "
+                "shape_type={shape_type}".format(**shape)
+            )
+            continue
+
+        class_name = shape["label"]
+        class_id = class_names.index(class_name)
+
+        (xmin, ymin), (xmax, ymax) = shape["points"]
+        # swap if min is larger than max.
+        xmin, xmax = sorted([xmin, xmax])
+        ymin, ymax = sorted([ymin, ymax])
+
+        bboxes.append([ymin, xmin, ymax, xmax])
+        labels.append(class_id)
+
+        xml.append(
+            maker.object(
+                maker.name(shape["label"]),
+                maker.pose(),
+                maker.truncated(),
+                maker.difficult(),
+                maker.bndbox(
+                    maker.xmin(str(xmin)),
+                    maker.ymin(str(ymin)),
+                    maker.xmax(str(xmax)),
+                    maker.ymax(str(ymax)),
+                ),
+            )
+        )
+
+    if not noviz:
+        captions = [class_names[label] for label in labels]
+        viz = imgviz.instances2rgb(
+            image=img,
+            labels=labels,
+            bboxes=bboxes,
+            captions=captions,
+            font_size=15,
+        )
+        imgviz.io.imsave(
+            osp.join(output_dir, "AnnotationsVisualization", base + ".jpg"),
+            viz,
+        )
+
+    with open(osp.join(output_dir, "Annotations", base + ".xml"), "wb") as f:
+        f.write(lxml.etree.tostring(xml, pretty_print=True))
+
+
+def convert_bbox(input_dir, output_dir, labels_file, noviz=False, jobs=1):
+    """Convert the rectangles of a directory of label files to VOC XML."""
+    if lxml is None:
+        raise ImportError("Please install lxml:\n\n    pip install lxml\n")
+    os.makedirs(output_dir)
+    os.makedirs(osp.join(output_dir, "JPEGImages"))
+    os.makedirs(osp.join(output_dir, "Annotations"))
+    if not noviz:
+        os.makedirs(osp.join(output_dir, "AnnotationsVisualization"))
+    print("Creating dataset:", output_dir)
+
+    class_names, _ = load_class_names(labels_file)
+    _save_class_names(output_dir, class_names)
+
+    label_files = find_label_files(input_dir)
+    worker = functools.partial(
+        convert_bbox_file,
+        output_dir=output_dir,
+        class_names=class_names,
+        noviz=noviz,
+    )
+    for filename, _ in zip(label_files, imap(worker, label_files, jobs)):
+        print("Generated dataset from:", filename)
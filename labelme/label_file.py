@@ -1,8 +1,14 @@
 import base64
 import contextlib
+import functools
+import hashlib
 import io
 import json
+import math
+import numbers
+import os
 import os.path as osp
+import re
 
 import PIL.Image
 
@@ -12,9 +18,17 @@ from labelme import PY2
 from labelme import QT4
 from labelme import utils
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 PIL.Image.MAX_IMAGE_PIXELS = None
 
+# "orjson" if installed, else "json"; set to "json" to use the stdlib only
+json_backend = "json" if orjson is None else "orjson"
+
 
 @contextlib.contextmanager
 def open(name, mode):
@@ -32,6 +46,132 @@ class LabelFileError(Exception):
     pass
 
 
+# orjson formats floats below 1e-4 or from 1e16 differently, e.g. 1e16
+# and 0.00001 where the json module writes 1e+16 and 1e-05; the exponent
+# is looked for in number tokens, not in text such as "Type1"
+_EXPONENT = re.compile(rb"(?<![\w.])\d+(?:\.\d*)?[eE][-+]?\d")
+
+
+def _json_default(obj):
+    # subclasses such as numpy.float64 are written by the json module
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    raise TypeError("Type is not JSON serializable: %s" % type(obj))
+
+
+def _has_non_finite(data):
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, float):
+            if not math.isfinite(obj):
+                return True
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, int)) or obj is None:
+            continue
+        elif isinstance(obj, numbers.Real) and not math.isfinite(obj):
+            return True
+    return False
+
+
+def json_dumps(data, compact=False):
+    """Serialize label data to UTF-8 JSON bytes.
+
+    The output is that of ``json.dumps(data, ensure_ascii=False,
+    indent=2)``, or with ``separators=(",", ":")`` if ``compact``, but is
+    produced by orjson when it is the backend. NaN and infinity, which
+    orjson would write as null, are written by the json module.
+    """
+    if json_backend == "orjson":
+        try:
+            content = orjson.dumps(
+                data,
+                default=_json_default,
+                option=0 if compact else orjson.OPT_INDENT_2,
+            )
+        except TypeError:  # e.g. integers beyond 64 bits
+            content = None
+        if (
+            content is not None
+            and content.find(b"0.0000") < 0
+            and not _EXPONENT.search(content)
+            and not (b"null" in content and _has_non_finite(data))
+        ):
+            return content
+    if compact:
+        content = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        content = json.dumps(data, ensure_ascii=False, indent=2)
+    return content.encode("utf-8")
+
+
+def json_loads(content):
+    """Parse JSON bytes or text with the JSON backend."""
+    if json_backend == "orjson":
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:  # e.g. NaN, read by the json module
+            pass
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    return json.loads(content)
+
+
+_IMAGE_DATA = re.compile(rb'"imageData"\s*:\s*"')
+_STRING_END = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"')
+_IMAGE_DATA_STUB = "\x00imageData"
+
+
+def _read_label_json(filename):
+    """Read a label JSON file without decoding its embedded image.
+
+    Returns ``(data, span)``. If the file embeds an image, ``span`` is the
+    ``(offset, length)`` in bytes of its base64 string, which is neither
+    decoded nor kept, and ``data["imageData"]`` is a placeholder.
+    Otherwise ``span`` is None and ``data`` is the whole document.
+    """
+    with io.open(filename, "rb") as f:
+        raw = f.read()
+    # labelme writes imageData after the shapes, which may have the same
+    # key, so the last occurrence is tried first
+    for match in reversed(list(_IMAGE_DATA.finditer(raw))):
+        end = _STRING_END.match(raw, match.end())
+        if end is None:
+            continue
+        stub = raw[: match.end() - 1] + b'"\\u0000imageData"'
+        data = json_loads(stub + raw[end.end() :])
+        if data.get("imageData") == _IMAGE_DATA_STUB:
+            return data, (match.end(), end.end() - 1 - match.end())
+    return json_loads(raw), None
+
+
+@functools.lru_cache(maxsize=1)
+def _b64encode(imageData):
+    # repeated saves of the same image encode it once
+    return base64.b64encode(imageData)
+
+
+def _write_atomic(filename, content):
+    """Write bytes to a temporary file and rename it over ``filename``."""
+    tmp = osp.join(
+        osp.dirname(filename),
+        ".{}.{}.tmp".format(osp.basename(filename), os.getpid()),
+    )
+    try:
+        with io.open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, filename)
+    except BaseException:
+        if osp.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
 class LabelFile(object):
 
     suffix = ".json"
@@ -44,6 +184,19 @@ class LabelFile(object):
             self.load(filename)
         self.filename = filename
 
+    @property
+    def imageData(self):
+        """Image data, read from the label or image file on first access."""
+        if self._imageDataLoader is not None:
+            self._imageData = self._imageDataLoader()
+            self._imageDataLoader = None
+        return self._imageData
+
+    @imageData.setter
+    def imageData(self, value):
+        self._imageData = value
+        self._imageDataLoader = None
+
     @staticmethod
     def load_image_file(filename):
         try:
@@ -71,6 +224,7 @@ class LabelFile(object):
         keys = [
             "version",
             "imageData",
+            "imageDataRef",  # image file in an ImageStore
             "imagePath",
             "shapes",  # polygonal annotations
             "flags",  # image level flags
@@ -86,8 +240,7 @@ class LabelFile(object):
             "description",
         ]
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
+            data, span = _read_label_json(filename)
             version = data.get("version")
             if version is None:
                 logger.warning(
@@ -104,21 +257,43 @@ class LabelFile(object):
                     )
                 )
 
-            if data["imageData"] is not None:
-                imageData = base64.b64decode(data["imageData"])
-                if PY2 and QT4:
-                    imageData = utils.img_data_to_png_data(imageData)
+            # relative path from label file to relative path from cwd
+            imagePath = osp.join(osp.dirname(filename), data["imagePath"])
+            imageHeight = data.get("imageHeight")
+            imageWidth = data.get("imageWidth")
+            imageDataLoader = None
+            if span is not None or data["imageData"] is not None:
+                if span is None:
+                    span = data["imageData"]
+                imageDataLoader = functools.partial(
+                    self._load_image_data,
+                    filename,
+                    span,
+                    self._file_stamp(os.stat(filename)),
+                    imageHeight,
+                    imageWidth,
+                )
+            elif data.get("imageDataRef"):
+                imageDataLoader = functools.partial(
+                    self._load_image_ref,
+                    osp.join(osp.dirname(filename), data["imageDataRef"]),
+                    imageHeight,
+                    imageWidth,
+                )
+            elif imagePath.endswith(utils.DICOM_EXTENSIONS):
+                # DICOM pixels are read by the app
+                self._check_image_height_and_width(
+                    self._image_size(None, imagePath), imageHeight, imageWidth
+                )
             else:
-                # relative path from label file to relative path from cwd
-                imagePath = osp.join(osp.dirname(filename), data["imagePath"])
-                imageData = self.load_image_file(imagePath)
+                imageDataLoader = functools.partial(
+                    self._load_image_file_checked,
+                    imagePath,
+                    imageHeight,
+                    imageWidth,
+                )
             flags = data.get("flags") or {}
             imagePath = data["imagePath"]
-            self._check_image_height_and_width(
-                base64.b64encode(imageData).decode("utf-8"),
-                data.get("imageHeight"),
-                data.get("imageWidth"),
-            )
             shapes = [
                 dict(
                     label=s["label"],
@@ -145,25 +320,97 @@ class LabelFile(object):
         self.flags = flags
         self.shapes = shapes
         self.imagePath = imagePath
-        self.imageData = imageData
+        self.imageData = None
+        self._imageDataLoader = imageDataLoader
         self.filename = filename
         self.otherData = otherData
 
     @staticmethod
-    def _check_image_height_and_width(imageData, imageHeight, imageWidth):
-        img_arr = utils.img_b64_to_arr(imageData)
-        if imageHeight is not None and img_arr.shape[0] != imageHeight:
+    def _file_stamp(stat):
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def _load_image_data(cls, filename, span, stamp, imageHeight, imageWidth):
+        """Decode the image embedded in a label file.
+
+        ``span`` is the base64 string itself, or its ``(offset, length)``
+        in the file, which must not have changed since it was loaded.
+        """
+        try:
+            if isinstance(span, tuple):
+                offset, length = span
+                with io.open(filename, "rb") as f:
+                    if cls._file_stamp(os.fstat(f.fileno())) != stamp:
+                        raise IOError(
+                            "{} changed since it was loaded".format(filename)
+                        )
+                    f.seek(offset)
+                    span = f.read(length)
+                if b"\\" in span:
+                    span = json_loads(b'"' + span + b'"')
+            imageData = base64.b64decode(span)
+            if PY2 and QT4:
+                imageData = utils.img_data_to_png_data(imageData)
+            cls._check_image_height_and_width(
+                cls._image_size(imageData), imageHeight, imageWidth
+            )
+        except Exception as e:
+            raise LabelFileError(e)
+        return imageData
+
+    @classmethod
+    def _load_image_ref(cls, filename, imageHeight, imageWidth):
+        try:
+            with io.open(filename, "rb") as f:
+                imageData = f.read()
+            cls._check_image_height_and_width(
+                cls._image_size(imageData), imageHeight, imageWidth
+            )
+        except Exception as e:
+            raise LabelFileError(e)
+        return imageData
+
+    @classmethod
+    def _load_image_file_checked(cls, imagePath, imageHeight, imageWidth):
+        try:
+            imageData = cls.load_image_file(imagePath)
+            if imageData is None:
+                raise IOError("Failed opening image file: %s" % imagePath)
+            cls._check_image_height_and_width(
+                cls._image_size(imageData), imageHeight, imageWidth
+            )
+        except Exception as e:
+            raise LabelFileError(e)
+        return imageData
+
+    @staticmethod
+    def _image_size(imageData, imagePath=None):
+        """Return ``(height, width)`` read from the image header, or None."""
+        if imageData is not None:
+            return utils.img_data_to_size(imageData)
+        if imagePath is not None and imagePath.endswith(
+            utils.DICOM_EXTENSIONS
+        ):
+            return utils.read_dicom_size(imagePath)
+        return None
+
+    @staticmethod
+    def _check_image_height_and_width(imageSize, imageHeight, imageWidth):
+        if imageSize is None:
+            return imageHeight, imageWidth
+        height, width = imageSize
+        if imageHeight is not None and height != imageHeight:
             logger.error(
                 "imageHeight does not match with imageData or imagePath, "
                 "so getting imageHeight from actual image."
             )
-            imageHeight = img_arr.shape[0]
-        if imageWidth is not None and img_arr.shape[1] != imageWidth:
+            imageHeight = height
+        if imageWidth is not None and width != imageWidth:
             logger.error(
                 "imageWidth does not match with imageData or imagePath, "
                 "so getting imageWidth from actual image."
             )
-            imageWidth = img_arr.shape[1]
+            imageWidth = width
         return imageHeight, imageWidth
 
     def save(
@@ -176,12 +423,34 @@ class LabelFile(object):
         imageData=None,
         otherData=None,
         flags=None,
+        imageStore=None,
+        previousHash=None,
+        compact=False,
     ):
+        """Save a label file and return the hash of its content.
+
+        With an ``ImageStore``, ``imageData`` is written to the store and
+        the label file refers to it by ``imageDataRef`` instead of
+        embedding it. The file is replaced atomically, and not written at
+        all if it exists and its content hashes to ``previousHash``.
+        ``compact`` writes the JSON without indentation.
+        """
+        imageDataRef = None
         if imageData is not None:
-            imageData = base64.b64encode(imageData).decode("utf-8")
             imageHeight, imageWidth = self._check_image_height_and_width(
-                imageData, imageHeight, imageWidth
+                self._image_size(imageData), imageHeight, imageWidth
             )
+            if imageStore is not None:
+                try:
+                    imageDataRef = osp.relpath(
+                        imageStore.put(imageData),
+                        osp.dirname(osp.abspath(filename)),
+                    ).replace(os.sep, "/")
+                except Exception as e:
+                    raise LabelFileError(e)
+                imageData = None
+            else:
+                imageData = _b64encode(imageData)
         if otherData is None:
             otherData = {}
         if flags is None:
@@ -195,15 +464,28 @@ class LabelFile(object):
             imageHeight=imageHeight,
             imageWidth=imageWidth,
         )
+        if imageDataRef is not None:
+            data["imageDataRef"] = imageDataRef
         for key, value in otherData.items():
             assert key not in data
             data[key] = value
         try:
-            with open(filename, "w") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if imageData is not None:
+                # spliced in after serializing, so that json_dumps checks
+                # the floats of the labels without scanning the image
+                data["imageData"] = _IMAGE_DATA_STUB
+            content = json_dumps(data, compact=compact)
+            if imageData is not None:
+                content = content.replace(
+                    b'"\\u0000imageData"', b'"%s"' % imageData, 1
+                )
+            contentHash = hashlib.sha1(content).hexdigest()
+            if contentHash != previousHash or not osp.exists(filename):
+                _write_atomic(filename, content)
             self.filename = filename
         except Exception as e:
             raise LabelFileError(e)
+        return contentHash
 
     @staticmethod
     def is_label_file(filename):
@@ -1,6 +1,7 @@
 import copy
 import math
 
+import numpy as np
 from qtpy import QtCore
 from qtpy import QtGui
 
@@ -8,10 +9,6 @@ from labelme.logger import logger
 import labelme.utils
 
 
-# TODO(unknown):
-# - [opt] Store paths instead of creating new ones at each paint.
-
-
 DEFAULT_LINE_COLOR = QtGui.QColor(0, 255, 0, 128)  # bf hovering
 DEFAULT_FILL_COLOR = QtGui.QColor(0, 255, 0, 128)  # hovering
 DEFAULT_SELECT_LINE_COLOR = QtGui.QColor(255, 255, 255)  # selected
@@ -45,6 +42,11 @@ class Shape(object):
     point_size = 8
     scale = 1.0
 
+    # Incremented on each change of the points of any shape, which then
+    # takes the new value as its version. A canvas compares it with the
+    # value of its last update to know if a shape may have changed.
+    last_version = 0
+
     def __init__(
         self,
         label=None,
@@ -81,6 +83,38 @@ class Shape(object):
 
         self.shape_type = shape_type
 
+    @property
+    def points(self):
+        """Points of the shape.
+
+        Change them through the methods of the shape or by assigning a new
+        list, so that ``version`` is updated.
+        """
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self._points = value
+        self._invalidate()
+
+    def _invalidate(self):
+        Shape.last_version += 1
+        self.version = Shape.last_version
+        self._points_array = None
+        # paths are built on first use and kept until the points change
+        self._path = None
+        self._line_path = None
+        self._vertex_path = None  # (parameters, path)
+
+    @property
+    def points_array(self):
+        """Points as a cached (N, 2) float array of x and y."""
+        if self._points_array is None:
+            self._points_array = np.array(
+                [(p.x(), p.y()) for p in self.points], dtype=float
+            ).reshape(-1, 2)
+        return self._points_array
+
     @property
     def shape_type(self):
         return self._shape_type
@@ -99,26 +133,32 @@ class Shape(object):
         ]:
             raise ValueError("Unexpected shape_type: {}".format(value))
         self._shape_type = value
+        self._invalidate()
 
     def close(self):
         self._closed = True
+        self._invalidate()
 
     def addPoint(self, point):
         if self.points and point == self.points[0]:
             self.close()
         else:
             self.points.append(point)
+            self._invalidate()
 
     def canAddPoint(self):
         return self.shape_type in ["polygon", "linestrip"]
 
     def popPoint(self):
         if self.points:
-            return self.points.pop()
+            point = self.points.pop()
+            self._invalidate()
+            return point
         return None
 
     def insertPoint(self, i, point):
         self.points.insert(i, point)
+        self._invalidate()
 
     def removePoint(self, i):
         if not self.canAddPoint():
@@ -145,12 +185,14 @@ class Shape(object):
             return
 
         self.points.pop(i)
+        self._invalidate()
 
     def isClosed(self):
         return self._closed
 
     def setOpen(self):
         self._closed = False
+        self._invalidate()
 
     def getRectFromLine(self, pt1, pt2):
         x1, y1 = pt1.x(), pt1.y()
@@ -167,40 +209,8 @@ class Shape(object):
             pen.setWidth(max(1, int(round(2.0 / self.scale))))
             painter.setPen(pen)
 
-            line_path = QtGui.QPainterPath()
-            vrtx_path = QtGui.QPainterPath()
-
-            if self.shape_type == "rectangle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    rectangle = self.getRectFromLine(*self.points)
-                    line_path.addRect(rectangle)
-                for i in range(len(self.points)):
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "circle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    rectangle = self.getCircleRectFromLine(self.points)
-                    line_path.addEllipse(rectangle)
-                for i in range(len(self.points)):
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "linestrip":
-                line_path.moveTo(self.points[0])
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    self.drawVertex(vrtx_path, i)
-            else:
-                line_path.moveTo(self.points[0])
-                # Uncommenting the following line will draw 2 paths
-                # for the 1st vertex, and make it non-filled, which
-                # may be desirable.
-                # self.drawVertex(vrtx_path, 0)
-
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    self.drawVertex(vrtx_path, i)
-                if self.isClosed():
-                    line_path.lineTo(self.points[0])
+            line_path = self._makeLinePath()
+            vrtx_path = self._makeVertexPath()
 
             painter.drawPath(line_path)
             painter.drawPath(vrtx_path)
@@ -213,6 +223,62 @@ class Shape(object):
                 )
                 painter.fillPath(line_path, color)
 
+    def _makeLinePath(self):
+        """Return the cached path of the outline drawn by ``paint``."""
+        if self._line_path is not None:
+            return self._line_path
+
+        line_path = QtGui.QPainterPath()
+        if self.shape_type == "rectangle":
+            assert len(self.points) in [1, 2]
+            if len(self.points) == 2:
+                rectangle = self.getRectFromLine(*self.points)
+                line_path.addRect(rectangle)
+        elif self.shape_type == "circle":
+            assert len(self.points) in [1, 2]
+            if len(self.points) == 2:
+                rectangle = self.getCircleRectFromLine(self.points)
+                line_path.addEllipse(rectangle)
+        elif self.points:
+            line_path.moveTo(self.points[0])
+            for p in self.points:
+                line_path.lineTo(p)
+            if self.shape_type != "linestrip" and self.isClosed():
+                line_path.lineTo(self.points[0])
+        self._line_path = line_path
+        return line_path
+
+    def _makeVertexPath(self):
+        """Return the cached path of the vertices drawn by ``paint``.
+
+        It is built again when the points, the scale or the highlighted
+        vertex change.
+        """
+        if self._highlightIndex is not None:
+            self._vertex_fill_color = self.hvertex_fill_color
+        else:
+            self._vertex_fill_color = self.vertex_fill_color
+        parameters = (
+            self.scale,
+            self.point_size,
+            self.point_type,
+            self._highlightIndex,
+            self._highlightMode,
+        )
+        if self._vertex_path is not None:
+            if self._vertex_path[0] == parameters:
+                return self._vertex_path[1]
+
+        vrtx_path = QtGui.QPainterPath()
+        # Uncommenting the following line will draw 2 paths
+        # for the 1st vertex of a polygon, and make it non-filled,
+        # which may be desirable.
+        # self.drawVertex(vrtx_path, 0)
+        for i in range(len(self.points)):
+            self.drawVertex(vrtx_path, i)
+        self._vertex_path = (parameters, vrtx_path)
+        return vrtx_path
+
     def drawVertex(self, path, i):
         d = self.point_size / self.scale
         shape = self.point_type
@@ -232,28 +298,26 @@ class Shape(object):
             assert False, "unsupported vertex shape"
 
     def nearestVertex(self, point, epsilon):
-        min_distance = float("inf")
-        min_i = None
-        for i, p in enumerate(self.points):
-            dist = labelme.utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        if not self.points:
+            return None
+        diff = self.points_array - (point.x(), point.y())
+        distances = np.hypot(diff[:, 0], diff[:, 1])
+        i = int(np.argmin(distances))
+        return i if distances[i] <= epsilon else None
 
     def nearestEdge(self, point, epsilon):
-        min_distance = float("inf")
-        post_i = None
-        for i in range(len(self.points)):
-            line = [self.points[i - 1], self.points[i]]
-            dist = labelme.utils.distancetoline(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        if not self.points:
+            return None
+        # edge i goes from point i - 1 to point i
+        ends = self.points_array
+        distances = labelme.utils.distances_to_lines(
+            (point.x(), point.y()), np.roll(ends, 1, axis=0), ends
+        )
+        i = int(np.argmin(distances))
+        return i if distances[i] <= epsilon else None
 
     def containsPoint(self, point):
-        return self.makePath().contains(point)
+        return self._makePath().contains(point)
 
     def getCircleRectFromLine(self, line):
         """Computes parameters to draw with `QPainterPath::addEllipse`"""
@@ -266,6 +330,11 @@ class Shape(object):
         return rectangle
 
     def makePath(self):
+        return QtGui.QPainterPath(self._makePath())
+
+    def _makePath(self):
+        if self._path is not None:
+            return self._path
         if self.shape_type == "rectangle":
             path = QtGui.QPainterPath()
             if len(self.points) == 2:
@@ -280,16 +349,18 @@ class Shape(object):
             path = QtGui.QPainterPath(self.points[0])
             for p in self.points[1:]:
                 path.lineTo(p)
+        self._path = path
         return path
 
     def boundingRect(self):
-        return self.makePath().boundingRect()
+        return self._makePath().boundingRect()
 
     def moveBy(self, offset):
         self.points = [p + offset for p in self.points]
 
     def moveVertexBy(self, i, offset):
         self.points[i] = self.points[i] + offset
+        self._invalidate()
 
     def highlightVertex(self, i, action):
         """Highlight a vertex appropriately based on the current action
@@ -309,6 +380,12 @@ class Shape(object):
     def copy(self):
         return copy.deepcopy(self)
 
+    def __getstate__(self):
+        # cached paths are built again by the copy instead of being copied
+        state = self.__dict__.copy()
+        state.update(_path=None, _line_path=None, _vertex_path=None)
+        return state
+
     def __len__(self):
         return len(self.points)
 
@@ -317,3 +394,4 @@ class Shape(object):
 
     def __setitem__(self, key, value):
         self.points[key] = value
+        self._invalidate()
@@ -2,20 +2,56 @@
 
 from ._io import lblsave
 
+from .cache import LRUCache
+
+from .prefetch import Prefetcher
+
+from .dicom import DicomFile
+from .dicom import DicomPixels
+from .dicom import DicomSeries
+from .dicom import group_dicom_series
+from .dicom import read_dicom_header
+from .dicom import read_dicom_pixels
+from .dicom import read_dicom_series
+from .dicom import read_dicom_size
+from .dicom import read_slice_info
+from .dicom import SliceInfo
+
+from .file_index import FileIndex
+
+from .grid_index import GridIndex
+
+from .image_store import ImageStore
+
+from .scan import DICOM_EXTENSIONS
+from .scan import has_label_file
+from .scan import list_directory
+from .scan import scan_images
+from .scan import ScanThread
+
+from .windowing import apply_window
+from .windowing import window_hu
+
 from .image import apply_exif_orientation
 from .image import img_arr_to_b64
 from .image import img_b64_to_arr
 from .image import img_data_to_arr
 from .image import img_data_to_pil
+from .image import img_data_to_size
 from .image import img_data_to_png_data
 from .image import img_pil_to_data
 
+from .shape import draw_shape
 from .shape import labelme_shapes_to_label
 from .shape import masks_to_bboxes
 from .shape import polygons_to_mask
+from .shape import shape_bounds
 from .shape import shape_to_mask
+from .shape import shape_to_mask_crop
 from .shape import shapes_to_label
 
+from .rle import RLEMask
+
 from .qt import newIcon
 from .qt import newButton
 from .qt import newAction
@@ -24,4 +60,6 @@ from .qt import labelValidator
 from .qt import struct
 from .qt import distance
 from .qt import distancetoline
+from .qt import distances_to_lines
+from .qt import img_arr_to_qimage
 from .qt import fmtShortcut
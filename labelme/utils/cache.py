@@ -0,0 +1,78 @@
+import collections
+import threading
+
+
+def _sizeof(value):
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    return len(value)
+
+
+class LRUCache(object):
+    """Least recently used cache bounded by the total size of its values.
+
+    The size of a value is taken from its ``nbytes`` attribute (NumPy arrays)
+    or its length (bytes). The most recently added value is always kept even
+    if it alone exceeds ``max_bytes``, so the image being displayed is never
+    evicted by itself. ``on_evict(key, value)`` is called for the values
+    evicted to make room, outside the lock of the cache.
+    """
+
+    def __init__(self, max_bytes, sizeof=None, on_evict=None):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or _sizeof
+        self._on_evict = on_evict
+        self._data = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        nbytes = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                self._nbytes -= self._data.pop(key)[1]
+            self._data[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes and len(self._data) > 1:
+                old_key, (old_value, old_nbytes) = self._data.popitem(
+                    last=False
+                )
+                self._nbytes -= old_nbytes
+                evicted.append((old_key, old_value))
+        if self._on_evict is not None:
+            for old_key, old_value in evicted:
+                self._on_evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, nbytes = self._data.pop(key)
+            self._nbytes -= nbytes
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,341 @@
+import collections
+import threading
+
+import natsort
+import numpy as np
+
+from .windowing import apply_window
+from .windowing import LUT_DTYPES
+from .windowing import values_present
+
+
+class DicomPixels(object):
+    """Stored pixel values of a DICOM image with its rescale parameters.
+
+    Keeping the stored values (instead of float HU) halves the memory of
+    16-bit images and lets windowing run through a lookup table.
+    """
+
+    def __init__(self, array, slope=1.0, intercept=0.0):
+        self.array = array
+        self.slope = slope
+        self.intercept = intercept
+        self._present = None
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def to_hu(self):
+        """Return the rescaled values, e.g. CT Hounsfield units, as int16."""
+        info = np.iinfo(np.int16)
+        if self.slope == 1 and float(self.intercept).is_integer():
+            values = self.array.astype(np.int32) + int(self.intercept)
+        else:
+            values = np.rint(
+                self.array.astype(np.float32) * self.slope + self.intercept
+            )
+        return np.clip(values, info.min, info.max).astype(np.int16)
+
+    def window(self, wc, ww, wf):
+        if self._present is None and self.array.dtype.name in LUT_DTYPES:
+            self._present = values_present(self.array)
+        return apply_window(
+            self.array,
+            wc,
+            ww,
+            wf,
+            slope=self.slope,
+            intercept=self.intercept,
+            present=self._present,
+        )
+
+
+def get_rescale(data_dicom):
+    slope = float(data_dicom.get("RescaleSlope", 1) or 1)
+    intercept = float(data_dicom.get("RescaleIntercept", 0) or 0)
+    return slope, intercept
+
+
+class DicomFile(object):
+    """DICOM file whose frames are decoded on demand.
+
+    Only the header is parsed when the file is opened. Uncompressed pixel
+    data is memory-mapped so that a frame is read from disk when it is
+    windowed; other pixel data is decoded one frame at a time by pydicom.
+    """
+
+    def __init__(self, filename):
+        import pydicom
+
+        self.filename = filename
+        # pixel data larger than defer_size is not read into memory
+        self.dataset = pydicom.dcmread(filename, defer_size=1024)
+        self.slope, self.intercept = get_rescale(self.dataset)
+        self.n_frames = int(self.dataset.get("NumberOfFrames", 1) or 1)
+        self._frames = self._memmap_frames()
+
+    def __len__(self):
+        return self.n_frames
+
+    def _memmap_frames(self):
+        ds = self.dataset
+        transfer_syntax = ds.file_meta.get("TransferSyntaxUID")
+        if (
+            transfer_syntax is None
+            or transfer_syntax.is_encapsulated
+            or transfer_syntax.is_deflated
+            or not transfer_syntax.is_little_endian
+        ):
+            return None
+        # pydicom masks or sign-extends the unused high bits
+        bits = ds.get("BitsAllocated")
+        if (
+            bits not in (8, 16)
+            or ds.get("BitsStored") != bits
+            or ds.get("SamplesPerPixel", 1) != 1
+        ):
+            return None
+        try:
+            element = ds.get_item(0x7FE00010, keep_deferred=True)  # PixelData
+        except TypeError:  # pydicom<3 never reads deferred values here
+            element = ds.get_item(0x7FE00010)
+        if element is None or getattr(element, "value", None) is not None:
+            return None
+        dtype = np.dtype(
+            "%s%d" % ("i" if ds.get("PixelRepresentation") else "u", bits // 8)
+        ).newbyteorder("<")
+        shape = (self.n_frames, ds.Rows, ds.Columns)
+        if element.length < np.prod(shape) * dtype.itemsize:
+            return None
+        return np.memmap(
+            self.filename,
+            dtype=dtype,
+            mode="r",
+            offset=element.value_tell,
+            shape=shape,
+        )
+
+    def frame(self, index=0):
+        """Return the stored pixels of a frame as ``DicomPixels``."""
+        if not 0 <= index < self.n_frames:
+            raise IndexError("frame index out of range: %d" % index)
+        if self._frames is not None:
+            array = self._frames[index]
+        else:
+            array = _decode_frame(self.filename, index, self.n_frames)
+        return DicomPixels(array, slope=self.slope, intercept=self.intercept)
+
+
+def _decode_frame(filename, index, n_frames):
+    try:
+        from pydicom.pixels import pixel_array
+    except ImportError:  # pydicom<3 decodes all frames at once
+        import pydicom
+
+        array = pydicom.dcmread(filename).pixel_array
+        return array[index] if n_frames > 1 else array
+    return np.asarray(pixel_array(filename, index=index))
+
+
+def read_dicom_pixels(filename, frame=0):
+    """Read the stored pixels and rescale parameters of a DICOM frame."""
+    return DicomFile(filename).frame(frame)
+
+
+def read_dicom_header(filename):
+    """Read a DICOM header without its pixel data, or None if unreadable."""
+    import pydicom
+
+    try:
+        return pydicom.dcmread(filename, stop_before_pixels=True)
+    except Exception:
+        return None
+
+
+def read_dicom_size(filename):
+    """Read ``(height, width)`` from a DICOM header, or None if unreadable."""
+    header = read_dicom_header(filename)
+    if header is None or "Rows" not in header or "Columns" not in header:
+        return None
+    return int(header.Rows), int(header.Columns)
+
+
+def _volume_dtype(header):
+    bits = header.get("BitsAllocated")
+    signed = bool(header.get("PixelRepresentation"))
+    # 16-bit CT values fit int16 unless all 16 bits of unsigned are used
+    if bits == 16 and (signed or header.get("BitsStored", bits) < 16):
+        return "int16"
+    if bits in (8, 16):
+        return np.dtype("%s%d" % ("i" if signed else "u", bits // 8)).name
+    return None
+
+
+def _slice_position(header):
+    position = header.get("ImagePositionPatient")
+    orientation = header.get("ImageOrientationPatient")
+    if position is None or orientation is None or len(orientation) != 6:
+        return None
+    normal = np.cross(
+        np.asarray(orientation[:3], dtype=float),
+        np.asarray(orientation[3:], dtype=float),
+    )
+    return float(np.dot(normal, np.asarray(position, dtype=float)))
+
+
+class SliceInfo(
+    collections.namedtuple(
+        "SliceInfo",
+        [
+            "series_uid",
+            "instance_uid",
+            "position",
+            "instance_number",
+            "rows",
+            "columns",
+            "n_frames",
+            "dtype",
+            "slope",
+            "intercept",
+        ],
+    )
+):
+    """Header fields of a DICOM file used to group it into a series."""
+
+    __slots__ = ()
+
+    @property
+    def is_slice(self):
+        """Whether the file can be a slice of a ``DicomSeries`` volume."""
+        return bool(
+            self.series_uid
+            and self.rows
+            and self.columns
+            and self.n_frames == 1
+            and self.dtype
+        )
+
+
+def read_slice_info(filename):
+    """Read the ``SliceInfo`` of a DICOM file, or None if unreadable."""
+    header = read_dicom_header(filename)
+    if header is None:
+        return None
+    slope, intercept = get_rescale(header)
+    samples = header.get("SamplesPerPixel", 1)
+    series_uid = header.get("SeriesInstanceUID")
+    instance_uid = header.get("SOPInstanceUID")
+    return SliceInfo(
+        series_uid=str(series_uid) if series_uid else None,
+        instance_uid=str(instance_uid) if instance_uid else None,
+        position=_slice_position(header),
+        instance_number=int(header.get("InstanceNumber") or 0),
+        rows=int(header.get("Rows") or 0),
+        columns=int(header.get("Columns") or 0),
+        n_frames=int(header.get("NumberOfFrames", 1) or 1),
+        dtype=_volume_dtype(header) if samples == 1 else None,
+        slope=slope,
+        intercept=intercept,
+    )
+
+
+class DicomSeries(object):
+    """Slices of a DICOM series stored in one preallocated 3-D volume.
+
+    Slices are read into ``volume`` on first access and ``slice`` returns
+    views into it, so a series is a single allocation instead of one per
+    file. ``release`` drops the volume.
+    """
+
+    def __init__(self, filenames, infos):
+        self.filenames = list(filenames)
+        self.rescales = [(info.slope, info.intercept) for info in infos]
+        self.shape = (len(self.filenames), infos[0].rows, infos[0].columns)
+        self.dtype = np.dtype(infos[0].dtype)
+        self._index = {f: i for i, f in enumerate(self.filenames)}
+        self._volume = None
+        self._loaded = np.zeros(len(self.filenames), dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __contains__(self, filename):
+        return filename in self._index
+
+    def index(self, filename):
+        return self._index[filename]
+
+    def slice(self, index):
+        """Return the stored pixels of a slice as a view into the volume."""
+        with self._lock:
+            if self._volume is None:
+                self._volume = np.empty(self.shape, dtype=self.dtype)
+                self._loaded[:] = False
+            volume = self._volume
+            loaded = self._loaded[index]
+        if not loaded:
+            array = read_dicom_pixels(self.filenames[index]).array
+            if array.shape != self.shape[1:]:
+                raise ValueError(
+                    "slice shape %s does not match series shape %s"
+                    % (array.shape, self.shape[1:])
+                )
+            volume[index] = array
+            with self._lock:
+                if self._volume is volume:
+                    self._loaded[index] = True
+        slope, intercept = self.rescales[index]
+        return DicomPixels(volume[index], slope=slope, intercept=intercept)
+
+    def release(self):
+        with self._lock:
+            self._volume = None
+
+
+def group_dicom_series(items):
+    """Group ``(filename, SliceInfo)`` items into ``DicomSeries``.
+
+    Files are grouped by SeriesInstanceUID and ordered along the slice
+    normal from ImagePositionPatient, falling back to InstanceNumber and
+    the filename. Returns ``(series, others)``, where ``others`` are the
+    files that are not slices of a series with more than one file.
+    """
+    groups = collections.OrderedDict()
+    others = []
+    for filename, info in items:
+        if info is None or not info.is_slice:
+            others.append(filename)
+            continue
+        key = (info.series_uid, info.rows, info.columns, info.dtype)
+        groups.setdefault(key, []).append((filename, info))
+
+    natkey = natsort.natsort_keygen()
+    series = []
+    for group in groups.values():
+        if len(group) == 1:
+            others.append(group[0][0])
+            continue
+        if any(info.position is None for _, info in group):
+            group = [(f, info._replace(position=0)) for f, info in group]
+        group.sort(
+            key=lambda item: (
+                item[1].position,
+                item[1].instance_number,
+                natkey(item[0]),
+            )
+        )
+        series.append(
+            DicomSeries([f for f, _ in group], [info for _, info in group])
+        )
+    return series, others
+
+
+def read_dicom_series(filenames):
+    """Group DICOM files into series, reading their headers only."""
+    return group_dicom_series((f, read_slice_info(f)) for f in filenames)
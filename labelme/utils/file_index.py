@@ -0,0 +1,118 @@
+import collections
+import os
+import os.path as osp
+import sqlite3
+import threading
+
+from .dicom import SliceInfo
+
+
+IndexEntry = collections.namedtuple(
+    "IndexEntry", ["name", "is_dir", "mtime_ns", "size", "info", "has_label"]
+)
+
+
+class FileIndex(object):
+    """SQLite index of scanned directories.
+
+    A directory is stored with its mtime and the entries needed to list
+    images: subdirectories, label files and images with their mtime, size,
+    DICOM ``SliceInfo`` and whether a label file is next to them. A stored
+    listing is valid as long as the mtime of the directory is unchanged.
+    Directories are keyed by their real path, so that a directory opened
+    through a relative path or a symlink shares its listing.
+    """
+
+    version = 3
+
+    def __init__(self, filename):
+        dirname = osp.dirname(filename)
+        if dirname and not osp.exists(dirname):
+            os.makedirs(dirname)
+        self.filename = filename
+        self._lock = threading.Lock()
+        # used from the scan thread, one at a time
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.execute("PRAGMA synchronous=OFF")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.version:
+            self._db.executescript(
+                """
+                DROP TABLE IF EXISTS directories;
+                DROP TABLE IF EXISTS entries;
+                CREATE TABLE directories (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER
+                );
+                CREATE TABLE entries (
+                    dir TEXT,
+                    name TEXT,
+                    is_dir INTEGER,
+                    mtime_ns INTEGER,
+                    size INTEGER,
+                    has_label INTEGER,
+                    %s,
+                    PRIMARY KEY (dir, name)
+                );
+                PRAGMA user_version=%d;
+                """
+                % (", ".join(SliceInfo._fields), self.version)
+            )
+
+    def _entry(self, row):
+        name, is_dir, mtime_ns, size, has_label = row[:5]
+        info = None
+        if any(value is not None for value in row[5:]):
+            info = SliceInfo(*row[5:])
+        return IndexEntry(
+            name, bool(is_dir), mtime_ns, size, info, bool(has_label)
+        )
+
+    @staticmethod
+    def _key(path):
+        return osp.realpath(path)
+
+    def entries(self, path, mtime_ns=None):
+        """Return the stored entries of a directory.
+
+        If ``mtime_ns`` is given, None is returned unless it matches the
+        stored mtime of the directory.
+        """
+        path = self._key(path)
+        with self._lock:
+            if mtime_ns is not None:
+                row = self._db.execute(
+                    "SELECT mtime_ns FROM directories WHERE path=?", (path,)
+                ).fetchone()
+                if row is None or row[0] != mtime_ns:
+                    return None
+            rows = self._db.execute(
+                "SELECT name, is_dir, mtime_ns, size, has_label, %s "
+                "FROM entries WHERE dir=?" % ", ".join(SliceInfo._fields),
+                (path,),
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def update(self, path, mtime_ns, entries):
+        """Replace the stored listing of a directory."""
+        path = self._key(path)
+        rows = [
+            (path, e.name, e.is_dir, e.mtime_ns, e.size, e.has_label)
+            + tuple(e.info or (None,) * len(SliceInfo._fields))
+            for e in entries
+        ]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries WHERE dir=?", (path,))
+            self._db.executemany(
+                "INSERT INTO entries VALUES (%s)"
+                % ", ".join("?" * (6 + len(SliceInfo._fields))),
+                rows,
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?)",
+                (path, mtime_ns),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
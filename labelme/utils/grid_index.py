@@ -0,0 +1,68 @@
+import collections
+import math
+
+
+class GridIndex(object):
+    """Spatial index of bounding boxes in a uniform grid of square cells.
+
+    A box is stored in each cell it overlaps, so that finding the boxes
+    near a point looks at the few keys of its cells instead of all boxes.
+    """
+
+    def __init__(self, cell_size=128):
+        self.cell_size = float(cell_size)
+        self._cells = collections.defaultdict(set)
+        self._boxes = {}  # key -> (box, cells)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, key):
+        return key in self._boxes
+
+    def _cells_of(self, x1, y1, x2, y2):
+        size = self.cell_size
+        i1, i2 = int(math.floor(x1 / size)), int(math.floor(x2 / size))
+        j1, j2 = int(math.floor(y1 / size)), int(math.floor(y2 / size))
+        return [(i, j) for i in range(i1, i2 + 1) for j in range(j1, j2 + 1)]
+
+    def insert(self, key, box):
+        """Add ``key`` with a box ``(x1, y1, x2, y2)``, replacing its box."""
+        self.remove(key)
+        x1, y1, x2, y2 = box
+        box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        cells = self._cells_of(*box)
+        for cell in cells:
+            self._cells[cell].add(key)
+        self._boxes[key] = (box, cells)
+
+    def remove(self, key):
+        entry = self._boxes.pop(key, None)
+        if entry is None:
+            return
+        for cell in entry[1]:
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._boxes.clear()
+
+    def query(self, x, y, margin=0):
+        """Return the keys whose box is within ``margin`` of a point."""
+        keys = set()
+        for cell in self._cells_of(
+            x - margin, y - margin, x + margin, y + margin
+        ):
+            keys.update(self._cells.get(cell, ()))
+        result = []
+        for key in keys:
+            x1, y1, x2, y2 = self._boxes[key][0]
+            if (
+                x1 - margin <= x <= x2 + margin
+                and y1 - margin <= y <= y2 + margin
+            ):
+                result.append(key)
+        return result
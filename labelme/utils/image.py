@@ -14,6 +14,13 @@ def img_data_to_pil(img_data):
     return img_pil
 
 
+def img_data_to_size(img_data):
+    """Return ``(height, width)`` of image data, reading only its header."""
+    with PIL.Image.open(io.BytesIO(img_data)) as img_pil:
+        width, height = img_pil.size
+    return height, width
+
+
 def img_data_to_arr(img_data):
     img_pil = img_data_to_pil(img_data)
     img_arr = np.array(img_pil)
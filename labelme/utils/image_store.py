@@ -0,0 +1,45 @@
+import hashlib
+import os
+import os.path as osp
+import tempfile
+
+
+class ImageStore(object):
+    """Content-addressed directory of image files.
+
+    An image is stored once under the SHA-256 of its bytes, so saving the
+    same image again, or from another label file, writes nothing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, key):
+        return osp.join(self.root, key[:2], key)
+
+    def put(self, data):
+        """Store image data and return the path of its file."""
+        filename = self.path(self.key(data))
+        if osp.exists(filename):
+            return filename
+        dirname = osp.dirname(filename)
+        if not osp.exists(dirname):
+            os.makedirs(dirname)
+        fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, filename)
+        except BaseException:
+            if osp.exists(tmp):
+                os.remove(tmp)
+            raise
+        return filename
+
+    def get(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
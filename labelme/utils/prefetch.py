@@ -0,0 +1,86 @@
+import concurrent.futures
+import functools
+import threading
+
+
+class Prefetcher(object):
+    """Load values into an LRUCache from background threads.
+
+    ``load(key)`` runs in a worker thread and its result, unless None, is
+    put into ``cache``. ``get`` returns a cached value, waits for a load
+    already in progress, or loads synchronously as a last resort.
+    ``discard`` drops keys whose values are stale, including the results of
+    loads still running.
+    """
+
+    def __init__(self, load, cache, max_workers=2):
+        self._load = load
+        self.cache = cache
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers
+        )
+        self._futures = {}
+        # key -> token of its latest request, whose result may be cached
+        self._tokens = {}
+        # reentrant: cancelling a future runs _done synchronously
+        self._lock = threading.RLock()
+
+    def _run(self, key, token=None):
+        value = self._load(key)
+        if value is not None:
+            with self._lock:
+                if token is None or self._tokens.get(key) is token:
+                    self.cache.put(key, value)
+        return value
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+                del self._tokens[key]
+
+    def prefetch(self, keys):
+        """Load keys in the given order, dropping stale queued requests."""
+        keys = [key for key in keys if key not in self.cache]
+        with self._lock:
+            for key, future in list(self._futures.items()):
+                if key not in keys and future.cancel():
+                    self._futures.pop(key, None)
+                    self._tokens.pop(key, None)
+            for key in keys:
+                if key in self._futures:
+                    continue
+                token = object()
+                future = self._executor.submit(self._run, key, token)
+                self._futures[key] = future
+                self._tokens[key] = token
+                future.add_done_callback(functools.partial(self._done, key))
+
+    def get(self, key):
+        # under the lock, a finished load is either cached or still pending
+        with self._lock:
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+            future = self._futures.get(key)
+        if future is not None and not future.cancel():
+            return future.result()
+        return self._run(key)
+
+    def discard(self, keys):
+        """Drop keys from the cache and from pending or running loads."""
+        with self._lock:
+            for key in keys:
+                future = self._futures.pop(key, None)
+                if future is not None:
+                    future.cancel()
+                self._tokens.pop(key, None)
+                self.cache.pop(key)
+
+    def shutdown(self):
+        with self._lock:
+            for future in list(self._futures.values()):
+                future.cancel()
+            self._futures.clear()
+            self._tokens.clear()
+        self._executor.shutdown(wait=False)
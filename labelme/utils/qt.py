@@ -83,16 +83,45 @@ def distance(p):
 
 def distancetoline(point, line):
     p1, p2 = line
-    p1 = np.array([p1.x(), p1.y()])
-    p2 = np.array([p2.x(), p2.y()])
-    p3 = np.array([point.x(), point.y()])
-    if np.dot((p3 - p1), (p2 - p1)) < 0:
-        return np.linalg.norm(p3 - p1)
-    if np.dot((p3 - p2), (p1 - p2)) < 0:
-        return np.linalg.norm(p3 - p2)
-    if np.linalg.norm(p2 - p1) == 0:
-        return 0
-    return np.linalg.norm(np.cross(p2 - p1, p1 - p3)) / np.linalg.norm(p2 - p1)
+    dx, dy = p2.x() - p1.x(), p2.y() - p1.y()
+    px, py = point.x() - p1.x(), point.y() - p1.y()
+    length2 = dx * dx + dy * dy
+    # parameter of the projection of the point, clamped to the segment
+    t = 0 if length2 == 0 else max(0, min(1, (px * dx + py * dy) / length2))
+    return sqrt((px - t * dx) ** 2 + (py - t * dy) ** 2)
+
+
+def distances_to_lines(point, starts, ends):
+    """Distances from a point to the segments between two (N, 2) arrays."""
+    starts = np.asarray(starts, dtype=float)
+    d = np.asarray(ends, dtype=float) - starts
+    p = np.asarray(point, dtype=float) - starts
+    length2 = np.einsum("ij,ij->i", d, d)
+    t = np.einsum("ij,ij->i", p, d)
+    np.divide(t, length2, out=t, where=length2 > 0)
+    t[length2 == 0] = 0
+    np.clip(t, 0, 1, out=t)
+    p -= t[:, None] * d
+    return np.hypot(p[:, 0], p[:, 1])
+
+
+def img_arr_to_qimage(img_arr):
+    """Wrap a uint8 grayscale or RGB array in a QImage without copying.
+
+    The image keeps a reference to the array, which must not be modified
+    while the image is in use.
+    """
+    img_arr = np.ascontiguousarray(img_arr, dtype=np.uint8)
+    if img_arr.ndim == 2:
+        fmt = QtGui.QImage.Format_Grayscale8
+    elif img_arr.ndim == 3 and img_arr.shape[2] == 3:
+        fmt = QtGui.QImage.Format_RGB888
+    else:
+        raise ValueError("Unsupported image shape: {}".format(img_arr.shape))
+    height, width = img_arr.shape[:2]
+    qimage = QtGui.QImage(img_arr.data, width, height, img_arr.strides[0], fmt)
+    qimage.ndarray = img_arr
+    return qimage
 
 
 def fmtShortcut(text):
@@ -0,0 +1,120 @@
+import numpy as np
+
+from .shape import shape_to_mask_crop
+
+
+def _merge(starts, ends):
+    # sort the runs and merge those that overlap or touch
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], np.maximum.accumulate(ends[order])
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > ends[:-1]
+    last = np.r_[np.flatnonzero(new)[1:] - 1, len(starts) - 1]
+    return starts[new], ends[last]
+
+
+class RLEMask(object):
+    """Binary mask stored as runs of pixels in column-major order.
+
+    Runs are kept as sorted ``[start, end)`` ranges of flat indices in
+    column-major (Fortran) order, as in COCO run-length encoding, so that
+    masks of large images take memory in proportion to their outline.
+    """
+
+    def __init__(self, size, starts=(), ends=()):
+        self.size = (int(size[0]), int(size[1]))
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+
+    @classmethod
+    def from_crop(cls, size, crop, offset=(0, 0)):
+        """Encode a mask crop placed at ``offset`` in an image of ``size``."""
+        height = size[0]
+        y1, x1 = offset
+        columns = np.zeros((crop.shape[1], crop.shape[0] + 2), dtype=np.int8)
+        columns[:, 1:-1] = crop.T
+        col, row = np.nonzero(np.diff(columns, axis=1))
+        index = (x1 + col) * height + y1 + row
+        # transitions alternate between starts and ends in each column
+        starts, ends = index[0::2], index[1::2]
+        if len(starts):
+            starts, ends = _merge(starts, ends)
+        return cls(size, starts, ends)
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls.from_crop(mask.shape[:2], mask)
+
+    @classmethod
+    def from_shape(cls, img_shape, points, shape_type=None, **kwargs):
+        """Encode a shape, drawing it only over its bounds."""
+        crop, offset = shape_to_mask_crop(
+            img_shape, points, shape_type, **kwargs
+        )
+        return cls.from_crop(img_shape[:2], crop, offset)
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def union(self, *others):
+        masks = (self,) + others
+        if any(mask.size != self.size for mask in masks):
+            raise ValueError("masks must have the same size")
+        starts = np.concatenate([mask.starts for mask in masks])
+        ends = np.concatenate([mask.ends for mask in masks])
+        if len(starts):
+            starts, ends = _merge(starts, ends)
+        return RLEMask(self.size, starts, ends)
+
+    @property
+    def area(self):
+        return int((self.ends - self.starts).sum())
+
+    @property
+    def bbox(self):
+        """Return ``(y1, x1, y2, x2)`` like ``masks_to_bboxes``."""
+        if not len(self.starts):
+            return (0, 0, 0, 0)
+        height = self.size[0]
+        col1, row1 = np.divmod(self.starts, height)
+        col2, row2 = np.divmod(self.ends - 1, height)
+        # a run that wraps into the next column covers every row
+        wraps = col1 != col2
+        y1 = 0 if wraps.any() else row1.min()
+        y2 = height if wraps.any() else row2.max() + 1
+        return (int(y1), int(col1.min()), int(y2), int(col2.max()) + 1)
+
+    @property
+    def counts(self):
+        """Lengths of alternating runs of 0 and 1, starting with 0."""
+        n = self.size[0] * self.size[1]
+        bounds = np.r_[0, np.c_[self.starts, self.ends].ravel(), n]
+        counts = np.diff(bounds)
+        if len(counts) > 1 and counts[-1] == 0:
+            counts = counts[:-1]
+        return counts.tolist()
+
+    def to_coco(self):
+        """Return the compressed RLE of ``pycocotools.mask.encode``."""
+        chars = []
+        counts = self.counts
+        for i, x in enumerate(counts):
+            if i > 2:
+                x -= counts[i - 2]
+            more = True
+            while more:
+                c = x & 0x1F
+                x >>= 5
+                more = x != -1 if c & 0x10 else x != 0
+                if more:
+                    c |= 0x20
+                chars.append(chr(c + 48))
+        return dict(size=list(self.size), counts="".join(chars))
+
+    def decode(self):
+        """Return the mask as a dense bool array."""
+        height, width = self.size
+        flat = np.zeros(height * width, dtype=np.int8)
+        np.add.at(flat, self.starts, 1)
+        np.add.at(flat, self.ends[self.ends < flat.size], -1)
+        return np.cumsum(flat).astype(bool).reshape(width, height).T
@@ -0,0 +1,264 @@
+import glob
+import os
+import os.path as osp
+import re
+import threading
+
+import natsort
+from qtpy import QtCore
+
+from .dicom import group_dicom_series
+from .dicom import read_slice_info
+from .file_index import IndexEntry
+
+
+DICOM_EXTENSIONS = (".dcm", ".JL")
+
+# label file of a frame of a multi-frame DICOM file, e.g. "a_0002.json"
+_FRAME_LABEL = re.compile(r"(.*)_\d{4}\.json$")
+
+
+def _scandir(path):
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _label_stems(names):
+    """Return the stems of label files, without and with a frame suffix."""
+    stems = set()
+    frame_stems = set()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        stems.add(name[: -len(".json")])
+        match = _FRAME_LABEL.match(name)
+        if match:
+            frame_stems.add(match.group(1))
+    return stems, frame_stems
+
+
+def _is_labeled(name, label_stems):
+    stems, frame_stems = label_stems
+    stem = osp.splitext(name)[0]
+    if stem in stems:
+        return True
+    return name.endswith(DICOM_EXTENSIONS) and stem in frame_stems
+
+
+def has_label_file(filename, output_dir=None):
+    """Return whether an image has a label file, in ``output_dir`` if given.
+
+    The frames of a multi-frame DICOM file are labeled in files named
+    ``<stem>_NNNN.json``, any of which counts as a label file.
+    """
+    stem = osp.splitext(osp.basename(filename))[0]
+    dirname = output_dir or osp.dirname(filename)
+    if osp.isfile(osp.join(dirname, stem + ".json")):
+        return True
+    if not filename.endswith(DICOM_EXTENSIONS):
+        return False
+    pattern = glob.escape(stem) + "_[0-9][0-9][0-9][0-9].json"
+    return bool(glob.glob(osp.join(glob.escape(dirname), pattern)))
+
+
+def _refresh_dicom(path, entry):
+    """Read the header of a stored DICOM entry again if its file changed."""
+    if entry.is_dir or not entry.name.endswith(DICOM_EXTENSIONS):
+        return entry
+    filename = osp.join(path, entry.name)
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return entry
+    if (stat.st_mtime_ns, stat.st_size) == (entry.mtime_ns, entry.size):
+        return entry
+    return entry._replace(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        info=read_slice_info(filename),
+    )
+
+
+def list_directory(path, extensions, index=None):
+    """List subdirectories, label files and images of a directory.
+
+    Returns a list of ``IndexEntry``. With a ``FileIndex``, the stored
+    listing is returned while the mtime of the directory is unchanged;
+    otherwise the directory is listed again. In both cases DICOM headers
+    are read only for files whose mtime or size changed, since a file
+    rewritten in place does not change the mtime of its directory.
+    """
+    extensions = tuple(extensions)
+    previous = {}
+    mtime_ns = None
+    if index is not None:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        entries = index.entries(path, mtime_ns=mtime_ns)
+        if entries is not None:
+            refreshed = [_refresh_dicom(path, entry) for entry in entries]
+            if refreshed != entries:
+                index.update(path, mtime_ns, refreshed)
+            return refreshed
+        previous = {entry.name: entry for entry in index.entries(path)}
+
+    dir_entries = _scandir(path)
+    label_stems = _label_stems(entry.name for entry in dir_entries)
+    entries = []
+    for entry in dir_entries:
+        name = entry.name
+        if entry.is_dir(follow_symlinks=False):
+            entries.append(IndexEntry(name, True, None, None, None, False))
+        elif name.endswith(".json"):
+            entries.append(IndexEntry(name, False, None, None, None, False))
+        elif name.lower().endswith(extensions) and entry.is_file():
+            mtime, size = None, None
+            if index is not None:
+                stat = entry.stat()
+                mtime, size = stat.st_mtime_ns, stat.st_size
+            info = None
+            if name.endswith(DICOM_EXTENSIONS):
+                old = previous.get(name)
+                if old is not None and old[2:4] == (mtime, size):
+                    info = old.info
+                else:
+                    info = read_slice_info(entry.path)
+            has_label = _is_labeled(name, label_stems)
+            entries.append(
+                IndexEntry(name, False, mtime, size, info, has_label)
+            )
+    if index is not None:
+        index.update(path, mtime_ns, entries)
+    return entries
+
+
+def scan_images(
+    folder,
+    extensions,
+    output_dir=None,
+    batch_size=1000,
+    stopped=None,
+    index=None,
+):
+    """Scan a directory tree for images, yielding batches in list order.
+
+    Each batch is ``(images, series)``, where ``images`` is a list of
+    ``(filename, has_label_file)`` and ``series`` the ``DicomSeries`` whose
+    files are in the batch. Directories are listed once with
+    ``os.scandir``, or taken from ``index`` (see ``list_directory``), and
+    visited depth first in natural order, which gives the same order as
+    ``natsort.os_sorted`` over the whole tree, except that the slices of a
+    series follow its first file in slice order. Label files are looked
+    up in the same listings, or in one listing of ``output_dir``.
+    ``stopped()`` is polled to cancel the scan.
+    """
+    extensions = tuple(extensions)
+    output_labels = None
+    if output_dir:
+        output_labels = _label_stems(e.name for e in _scandir(output_dir))
+    key = natsort.os_sort_keygen()
+
+    def sort_key(item):
+        path, entry = item
+        # a directory sorts like its files, e.g. after "a.png" for "a/"
+        if entry.is_dir:
+            return key(osp.join(path, "\uffff"))
+        return key(path)
+
+    images = []
+    series = []
+
+    def scan_dir(path):
+        entries = sorted(
+            (
+                (osp.join(path, entry.name), entry)
+                for entry in list_directory(path, extensions, index=index)
+                if entry.is_dir or entry.name.lower().endswith(extensions)
+            ),
+            key=sort_key,
+        )
+        series_of = {}
+        dicoms = [
+            (filename, entry.info)
+            for filename, entry in entries
+            if filename.endswith(DICOM_EXTENSIONS) and not entry.is_dir
+        ]
+        if dicoms:
+            for s in group_dicom_series(dicoms)[0]:
+                for filename in s.filenames:
+                    series_of[filename] = s
+        has_label = {filename: entry.has_label for filename, entry in entries}
+        added = set()
+        for filename, entry in entries:
+            if stopped is not None and stopped():
+                return
+            if entry.is_dir:
+                if images:
+                    yield flush()
+                for batch in scan_dir(filename):
+                    yield batch
+                continue
+            s = series_of.get(filename)
+            if s is None:
+                filenames = [filename]
+            elif s in added:
+                continue
+            else:
+                added.add(s)
+                series.append(s)
+                filenames = s.filenames
+            for filename in filenames:
+                if output_labels is None:
+                    labeled = has_label[filename]
+                else:
+                    labeled = _is_labeled(
+                        osp.basename(filename), output_labels
+                    )
+                images.append((filename, labeled))
+            if len(images) >= batch_size:
+                yield flush()
+
+    def flush():
+        batch = (list(images), list(series))
+        del images[:]
+        del series[:]
+        return batch
+
+    for batch in scan_dir(folder):
+        yield batch
+    if images and not (stopped is not None and stopped()):
+        yield flush()
+
+
+class ScanThread(QtCore.QThread):
+    """Run ``scan_images`` in a worker thread, emitting ``batchReady``."""
+
+    batchReady = QtCore.Signal(object, object)
+
+    def __init__(
+        self, folder, extensions, output_dir=None, index=None, parent=None
+    ):
+        super(ScanThread, self).__init__(parent)
+        self.folder = folder
+        self.extensions = extensions
+        self.output_dir = output_dir
+        self.index = index
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        for images, series in scan_images(
+            self.folder,
+            self.extensions,
+            output_dir=self.output_dir,
+            stopped=self._stopped.is_set,
+            index=self.index,
+        ):
+            self.batchReady.emit(images, series)
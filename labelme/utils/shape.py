@@ -16,42 +16,115 @@ def polygons_to_mask(img_shape, polygons, shape_type=None):
     return shape_to_mask(img_shape, points=polygons, shape_type=shape_type)
 
 
-def shape_to_mask(
-    img_shape, points, shape_type=None, line_width=10, point_size=5
+def draw_shape(
+    draw, points, shape_type=None, value=1, line_width=10, point_size=5
 ):
-    mask = np.zeros(img_shape[:2], dtype=np.uint8)
-    mask = PIL.Image.fromarray(mask)
-    draw = PIL.ImageDraw.Draw(mask)
+    """Draw a shape filled with ``value`` on a ``PIL.ImageDraw.Draw``."""
     xy = [tuple(point) for point in points]
     if shape_type == "circle":
         assert len(xy) == 2, "Shape of shape_type=circle must have 2 points"
         (cx, cy), (px, py) = xy
         d = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
-        draw.ellipse([cx - d, cy - d, cx + d, cy + d], outline=1, fill=1)
+        draw.ellipse(
+            [cx - d, cy - d, cx + d, cy + d], outline=value, fill=value
+        )
     elif shape_type == "rectangle":
         assert len(xy) == 2, "Shape of shape_type=rectangle must have 2 points"
-        draw.rectangle(xy, outline=1, fill=1)
+        draw.rectangle(xy, outline=value, fill=value)
     elif shape_type == "line":
         assert len(xy) == 2, "Shape of shape_type=line must have 2 points"
-        draw.line(xy=xy, fill=1, width=line_width)
+        draw.line(xy=xy, fill=value, width=line_width)
     elif shape_type == "linestrip":
-        draw.line(xy=xy, fill=1, width=line_width)
+        draw.line(xy=xy, fill=value, width=line_width)
     elif shape_type == "point":
         assert len(xy) == 1, "Shape of shape_type=point must have 1 points"
         cx, cy = xy[0]
         r = point_size
-        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=1, fill=1)
+        draw.ellipse(
+            [cx - r, cy - r, cx + r, cy + r], outline=value, fill=value
+        )
     else:
         assert len(xy) > 2, "Polygon must have points more than 2"
-        draw.polygon(xy=xy, outline=1, fill=1)
+        draw.polygon(xy=xy, outline=value, fill=value)
+
+
+def shape_to_mask(
+    img_shape, points, shape_type=None, line_width=10, point_size=5
+):
+    mask = PIL.Image.new("1", (img_shape[1], img_shape[0]))
+    draw_shape(
+        PIL.ImageDraw.Draw(mask),
+        points,
+        shape_type,
+        line_width=line_width,
+        point_size=point_size,
+    )
     mask = np.array(mask, dtype=bool)
     return mask
 
 
+def shape_bounds(
+    img_shape, points, shape_type=None, line_width=10, point_size=5
+):
+    """Return the ``(y1, x1, y2, x2)`` pixel bounds a shape can cover.
+
+    The bounds are clipped to the image, ``y2`` and ``x2`` exclusive.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if shape_type == "circle":
+        (cx, cy), (px, py) = points[:2]
+        d = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
+        lo, hi = np.array([cx - d, cy - d]), np.array([cx + d, cy + d])
+    else:
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        if shape_type == "point":
+            lo, hi = lo - point_size, hi + point_size
+        elif shape_type in ["line", "linestrip"]:
+            lo, hi = lo - line_width, hi + line_width
+    # a pixel of margin for the outline
+    x1 = max(int(math.floor(lo[0])) - 1, 0)
+    y1 = max(int(math.floor(lo[1])) - 1, 0)
+    x2 = max(min(int(math.ceil(hi[0])) + 2, img_shape[1]), x1)
+    y2 = max(min(int(math.ceil(hi[1])) + 2, img_shape[0]), y1)
+    return y1, x1, y2, x2
+
+
+def shape_to_mask_crop(
+    img_shape, points, shape_type=None, line_width=10, point_size=5
+):
+    """Return the mask of a shape cropped to its bounds, and their offset.
+
+    The mask covers ``shape_bounds``, so memory and time scale with the
+    size of the shape instead of the image. It is pasted into place with
+    ``mask[y1:y1 + h, x1:x1 + w]`` for the offset ``(y1, x1)``. As PIL does
+    not rasterize exactly the same under translation, a boundary pixel may
+    rarely differ from ``shape_to_mask``.
+    """
+    y1, x1, y2, x2 = shape_bounds(
+        img_shape, points, shape_type, line_width, point_size
+    )
+    mask = PIL.Image.new("1", (x2 - x1, y2 - y1))
+    if x2 > x1 and y2 > y1:
+        draw_shape(
+            PIL.ImageDraw.Draw(mask),
+            [(x - x1, y - y1) for x, y in points],
+            shape_type,
+            line_width=line_width,
+            point_size=point_size,
+        )
+    mask = np.array(mask, dtype=bool).reshape(y2 - y1, x2 - x1)
+    return mask, (y1, x1)
+
+
 def shapes_to_label(img_shape, shapes, label_name_to_value):
-    cls = np.zeros(img_shape[:2], dtype=np.int32)
-    ins = np.zeros_like(cls)
-    instances = []
+    # every shape is drawn with its ids straight into 32-bit label images,
+    # so that a shape only touches the pixels it covers
+    size = (img_shape[1], img_shape[0])
+    cls = PIL.Image.new("I", size)
+    ins = PIL.Image.new("I", size)
+    cls_draw = PIL.ImageDraw.Draw(cls)
+    ins_draw = PIL.ImageDraw.Draw(ins)
+    instances = {}
     for shape in shapes:
         points = shape["points"]
         label = shape["label"]
@@ -63,15 +136,14 @@ def shapes_to_label(img_shape, shapes, label_name_to_value):
         cls_name = label
         instance = (cls_name, group_id)
 
-        if instance not in instances:
-            instances.append(instance)
-        ins_id = instances.index(instance) + 1
+        ins_id = instances.setdefault(instance, len(instances) + 1)
         cls_id = label_name_to_value[cls_name]
 
-        mask = shape_to_mask(img_shape[:2], points, shape_type)
-        cls[mask] = cls_id
-        ins[mask] = ins_id
+        draw_shape(cls_draw, points, shape_type, value=cls_id)
+        draw_shape(ins_draw, points, shape_type, value=ins_id)
 
+    cls = np.array(cls, dtype=np.int32)
+    ins = np.array(ins, dtype=np.int32)
     return cls, ins
 
 
@@ -105,8 +177,12 @@ def masks_to_bboxes(masks):
         )
     bboxes = []
     for mask in masks:
-        where = np.argwhere(mask)
-        (y1, x1), (y2, x2) = where.min(0), where.max(0) + 1
-        bboxes.append((y1, x1, y2, x2))
+        # bounds of the rows and columns with any pixel of the mask
+        ys = np.flatnonzero(mask.any(axis=1))
+        xs = np.flatnonzero(mask.any(axis=0))
+        if len(ys) == 0:
+            bboxes.append((0, 0, 0, 0))
+            continue
+        bboxes.append((ys[0], xs[0], ys[-1] + 1, xs[-1] + 1))
     bboxes = np.asarray(bboxes, dtype=np.float32)
     return bboxes
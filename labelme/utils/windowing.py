@@ -0,0 +1,98 @@
+import functools
+
+import numpy as np
+
+
+# Integer dtypes small enough to window with a lookup table indexed by the
+# stored pixel value (at most 2**16 entries).
+LUT_DTYPES = ("uint8", "int8", "uint16", "int16")
+
+
+def _index_dtype(dtype):
+    return np.dtype("uint%d" % (8 * np.dtype(dtype).itemsize))
+
+
+@functools.lru_cache(maxsize=32)
+def window_table(dtype, slope, intercept, wc, ww, wf):
+    """Windowed value of every possible stored value of an integer dtype.
+
+    Entry ``i`` corresponds to the stored value whose bit pattern is ``i``.
+    The table holds the clipped HU values before normalization, and is
+    cached per ``(dtype, slope, intercept, wc, ww, wf)``.
+    """
+    dtype = np.dtype(dtype)
+    index = np.arange(2 ** (8 * dtype.itemsize), dtype=_index_dtype(dtype))
+    table = (index.view(dtype) * slope + intercept).astype(np.float32)
+    table[table > wf] = 0
+    np.clip(table, wc - ww, wc + ww, out=table)
+    table.flags.writeable = False
+    return table
+
+
+def values_present(stored):
+    """Return which table entries occur in the stored pixel array."""
+    index = stored.view(_index_dtype(stored.dtype)).ravel()
+    counts = np.bincount(index, minlength=2 ** (8 * stored.dtype.itemsize))
+    return counts > 0
+
+
+def window_lut(table, present):
+    """Normalize a window table to uint8 over the values actually present.
+
+    This reproduces ``window_hu``, which stretches the clipped values of the
+    image to the full 0-255 range.
+    """
+    values = table[present]
+    min_, max_ = float(values.min()), float(values.max())
+    if max_ == min_:
+        return np.zeros(table.shape, dtype=np.uint8)
+    lut = table - min_
+    lut /= max_ - min_
+    lut *= 255
+    return lut.astype(np.uint8)
+
+
+def window_hu(hu, wc, ww, wf):
+    """Clip HU values to the window and scale them to uint8.
+
+    Values above ``wf`` are treated as 0 before clipping to
+    ``[wc - ww, wc + ww]``, and the result is stretched to the full
+    0-255 range. ``hu`` is not modified.
+    """
+    img = np.where(hu > wf, 0, hu).astype(np.float32, copy=False)
+    np.clip(img, wc - ww, wc + ww, out=img)
+    min_, max_ = float(img.min()), float(img.max())
+    if max_ == min_:
+        return np.zeros(img.shape, dtype=np.uint8)
+    img -= min_
+    img /= max_ - min_
+    img *= 255
+    return img.astype(np.uint8)
+
+
+def apply_window(stored, wc, ww, wf, slope=1.0, intercept=0.0, present=None):
+    """Window stored DICOM pixel values to uint8.
+
+    8/16-bit integer pixels go through a cached lookup table, so no float
+    image is allocated. Other dtypes fall back to ``window_hu``.
+    ``present`` may be passed to reuse the result of ``values_present``.
+    """
+    if stored.dtype.name not in LUT_DTYPES:
+        hu = stored.astype(np.float32)
+        if slope != 1:
+            hu *= slope
+        hu += intercept
+        return window_hu(hu, wc, ww, wf)
+
+    table = window_table(
+        stored.dtype.name,
+        float(slope),
+        float(intercept),
+        float(wc),
+        float(ww),
+        float(wf),
+    )
+    if present is None:
+        present = values_present(stored)
+    lut = window_lut(table, present)
+    return np.take(lut, stored.view(_index_dtype(stored.dtype)))
@@ -8,6 +8,13 @@ from .color_dialog import ColorDialog
 
 from .file_dialog_preview import FileDialogPreview
 
+from .file_list_widget import filename_filter
+from .file_list_widget import FileList
+from .file_list_widget import FileListModel
+from .file_list_widget import FileListWidget
+
+from .frame_widget import FrameWidget
+
 from .label_dialog import LabelDialog
 from .label_dialog import LabelQLineEdit
 
@@ -16,6 +16,7 @@ CURSOR_POINT = QtCore.Qt.PointingHandCursor
 CURSOR_DRAW = QtCore.Qt.CrossCursor
 CURSOR_MOVE = QtCore.Qt.ClosedHandCursor
 CURSOR_GRAB = QtCore.Qt.OpenHandCursor
+CURSOR_WINDOW_LEVEL = QtCore.Qt.SizeAllCursor
 
 MOVE_SPEED = 5.0
 
@@ -29,6 +30,7 @@ class Canvas(QtWidgets.QWidget):
     shapeMoved = QtCore.Signal()
     drawingPolygon = QtCore.Signal(bool)
     vertexSelected = QtCore.Signal(bool)
+    windowLevelRequest = QtCore.Signal(int, int)
 
     CREATE, EDIT = 0, 1
 
@@ -89,6 +91,14 @@ class Canvas(QtWidgets.QWidget):
         self.movingShape = False
         self.snapping = True
         self.hShapeIsSelected = False
+        # bounding boxes of the visible shapes, for hit-testing
+        self.shapeIndex = labelme.utils.GridIndex()
+        self._shapeVersions = {}  # shape -> version in shapeIndex
+        self._shapeOrder = {}  # shape -> index in self.shapes
+        self._indexState = None
+        # Shift + right-drag changes window/level when enabled
+        self._windowLevelEnabled = False
+        self.windowLevelPos = None
         self._painter = QtGui.QPainter()
         self._cursor = CURSOR_DEFAULT
         # Menus:
@@ -105,6 +115,11 @@ class Canvas(QtWidgets.QWidget):
     def setFillDrawing(self, value):
         self._fill_drawing = value
 
+    def setWindowLevelEnabled(self, value):
+        self._windowLevelEnabled = value
+        if not value:
+            self.windowLevelPos = None
+
     @property
     def createMode(self):
         return self._createMode
@@ -169,6 +184,53 @@ class Canvas(QtWidgets.QWidget):
     def isVisible(self, shape):
         return self.visible.get(shape, True)
 
+    def updateShapeIndex(self):
+        """Bring the spatial index of the visible shapes up to date.
+
+        Nothing is done unless the list of shapes, their visibility or the
+        points of any shape changed since the last update, and only the
+        shapes whose version changed are indexed again.
+        """
+        if (
+            self._indexState is not None
+            and self._indexState[0] == Shape.last_version
+            and self._indexState[1] == self.shapes
+            and self._indexState[2] == self.visible
+        ):
+            return
+        self._indexState = (
+            Shape.last_version,
+            list(self.shapes),
+            dict(self.visible),
+        )
+
+        versions = {}
+        for shape in self.shapes:
+            if not shape.points or not self.isVisible(shape):
+                continue
+            versions[shape] = shape.version
+            if self._shapeVersions.get(shape) != shape.version:
+                rect = shape.boundingRect()
+                self.shapeIndex.insert(
+                    shape,
+                    (rect.left(), rect.top(), rect.right(), rect.bottom()),
+                )
+        for shape in set(self._shapeVersions) - set(versions):
+            self.shapeIndex.remove(shape)
+        self._shapeVersions = versions
+        self._shapeOrder = {shape: i for i, shape in enumerate(self.shapes)}
+
+    def shapesAt(self, point, epsilon=0):
+        """Return the visible shapes near a point, the topmost first.
+
+        These are the shapes whose bounding box is within ``epsilon`` of
+        the point, the only ones that can have a vertex or an edge that
+        close or contain it.
+        """
+        self.updateShapeIndex()
+        shapes = self.shapeIndex.query(point.x(), point.y(), epsilon)
+        return sorted(shapes, key=self._shapeOrder.get, reverse=True)
+
     def drawing(self):
         return self.mode == self.CREATE
 
@@ -210,6 +272,13 @@ class Canvas(QtWidgets.QWidget):
         except AttributeError:
             return
 
+        if self.windowLevelPos is not None:
+            delta = ev.pos() - self.windowLevelPos
+            self.windowLevelPos = ev.pos()
+            if delta.x() or delta.y():
+                self.windowLevelRequest.emit(delta.x(), delta.y())
+            return
+
         self.prevMovePoint = pos
         self.restoreCursor()
 
@@ -287,7 +356,7 @@ class Canvas(QtWidgets.QWidget):
         # - Highlight vertex
         # Update shape/vertex fill and tooltip value accordingly.
         self.setToolTip(self.tr("Image"))
-        for shape in reversed([s for s in self.shapes if self.isVisible(s)]):
+        for shape in self.shapesAt(pos, self.epsilon / self.scale):
             # Look for a nearby vertex to highlight. If that fails,
             # check if we happen to be inside a shape.
             index = shape.nearestVertex(pos, self.epsilon / self.scale)
@@ -365,6 +434,14 @@ class Canvas(QtWidgets.QWidget):
             pos = self.transformPos(ev.localPos())
         else:
             pos = self.transformPos(ev.posF())
+        if (
+            self._windowLevelEnabled
+            and ev.button() == QtCore.Qt.RightButton
+            and int(ev.modifiers()) == QtCore.Qt.ShiftModifier
+        ):
+            self.windowLevelPos = ev.pos()
+            self.overrideCursor(CURSOR_WINDOW_LEVEL)
+            return
         if ev.button() == QtCore.Qt.LeftButton:
             if self.drawing():
                 if self.current:
@@ -421,6 +498,13 @@ class Canvas(QtWidgets.QWidget):
             self.prevPoint = pos
 
     def mouseReleaseEvent(self, ev):
+        if (
+            ev.button() == QtCore.Qt.RightButton
+            and self.windowLevelPos is not None
+        ):
+            self.windowLevelPos = None
+            self.restoreCursor()
+            return
         if ev.button() == QtCore.Qt.RightButton:
             menu = self.menus[len(self.selectedShapesCopy) > 0]
             self.restoreCursor()
@@ -505,8 +589,8 @@ class Canvas(QtWidgets.QWidget):
             index, shape = self.hVertex, self.hShape
             shape.highlightVertex(index, shape.MOVE_VERTEX)
         else:
-            for shape in reversed(self.shapes):
-                if self.isVisible(shape) and shape.containsPoint(point):
+            for shape in self.shapesAt(point):
+                if shape.containsPoint(point):
                     self.setHiding()
                     if shape not in self.selectedShapes:
                         if multiple_selection_mode:
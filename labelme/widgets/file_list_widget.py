@@ -0,0 +1,223 @@
+import array
+import collections.abc
+import fnmatch
+import re
+
+from qtpy import QtCore
+from qtpy.QtCore import Qt
+from qtpy import QtWidgets
+
+
+def filename_filter(pattern):
+    """Return a function matching filenames against a search pattern.
+
+    ``re:`` starts a regular expression and a pattern containing ``*``,
+    ``?`` or ``[`` is a glob matched against the basename, or against the
+    path if it contains a separator. Other patterns match as substrings.
+    None is returned for an empty pattern.
+    """
+    if not pattern:
+        return None
+    if pattern.startswith("re:"):
+        try:
+            return re.compile(pattern[3:]).search
+        except re.error:
+            return lambda filename: False
+    if any(c in pattern for c in "*?["):
+        match = re.compile(fnmatch.translate(pattern)).match
+        if "/" in pattern or "\\" in pattern:
+            return match
+        return lambda filename: match(
+            filename[max(filename.rfind("/"), filename.rfind("\\")) + 1 :]
+        )
+    return lambda filename: pattern in filename
+
+
+class FileList(collections.abc.Sequence):
+    """Read-only sequence of the filenames shown by a ``FileListModel``.
+
+    It does not copy the filenames, and ``in`` and ``index`` take
+    constant time.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __len__(self):
+        return self._model.rowCount()
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("row out of range: %d" % row)
+        return self._model.filename(row)
+
+    def __contains__(self, filename):
+        return self._model.row(filename) >= 0
+
+    def index(self, filename, *args):
+        row = self._model.row(filename)
+        if row < 0:
+            raise ValueError("{} is not in the file list".format(filename))
+        return row
+
+
+class FileListModel(QtCore.QAbstractListModel):
+    """Scanned files with their label state, filtered in memory.
+
+    All files added are kept, and the rows are the files accepted by the
+    filter, so changing the filter never touches the disk. Rows are found
+    by filename through a dict.
+    """
+
+    def __init__(self, parent=None):
+        super(FileListModel, self).__init__(parent)
+        self._files = []
+        self._checked = bytearray()
+        self._index = {}  # filename -> index into self._files
+        self._match = None
+        # indices into self._files of the shown files, and their inverse
+        self._rows = array.array("l")
+        self._row_of = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self._files[i]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self._checked[i] else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def filename(self, row):
+        return self._files[self._rows[row]]
+
+    def filenames(self):
+        return [self._files[i] for i in self._rows]
+
+    def fileList(self):
+        return FileList(self)
+
+    def row(self, filename):
+        """Return the row of a filename, or -1 if it is not shown."""
+        return self._row_of.get(filename, -1)
+
+    def addFiles(self, files):
+        """Append ``(filename, has_label_file)`` pairs."""
+        start = len(self._files)
+        for filename, checked in files:
+            self._index[filename] = len(self._files)
+            self._files.append(filename)
+            self._checked.append(bool(checked))
+        rows = [
+            i
+            for i in range(start, len(self._files))
+            if self._match is None or self._match(self._files[i])
+        ]
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(
+                QtCore.QModelIndex(), first, first + len(rows) - 1
+            )
+            for row, i in enumerate(rows, first):
+                self._row_of[self._files[i]] = row
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def setFilter(self, match):
+        """Show the files for which ``match(filename)`` is true, or all."""
+        self.beginResetModel()
+        self._match = match
+        if match is None:
+            self._rows = array.array("l", range(len(self._files)))
+        else:
+            self._rows = array.array(
+                "l", (i for i, f in enumerate(self._files) if match(f))
+            )
+        self._row_of = {
+            self._files[i]: row for row, i in enumerate(self._rows)
+        }
+        self.endResetModel()
+
+    def setChecked(self, filename, checked):
+        i = self._index.get(filename)
+        if i is None:
+            return
+        self._checked[i] = bool(checked)
+        row = self.row(filename)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+
+    def clear(self):
+        self.beginResetModel()
+        self._files = []
+        self._checked = bytearray()
+        self._index = {}
+        self._rows = array.array("l")
+        self._row_of = {}
+        self.endResetModel()
+
+
+class FileListWidget(QtWidgets.QListView):
+
+    itemSelectionChanged = QtCore.Signal()
+
+    def __init__(self):
+        super(FileListWidget, self).__init__()
+        self.setModel(FileListModel(self))
+        # lay out rows in batches so that large lists stay responsive
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setBatchSize(1000)
+        self.selectionModel().selectionChanged.connect(
+            self.itemSelectionChangedEvent
+        )
+
+    def itemSelectionChangedEvent(self, selected, deselected):
+        self.itemSelectionChanged.emit()
+
+    def count(self):
+        return self.model().rowCount()
+
+    def filenames(self):
+        return self.model().filenames()
+
+    def fileList(self):
+        return self.model().fileList()
+
+    def selectedFiles(self):
+        return [
+            self.model().filename(index.row())
+            for index in self.selectedIndexes()
+        ]
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.model().index(row))
+
+    def addFiles(self, files):
+        self.model().addFiles(files)
+
+    def setFilter(self, match):
+        self.model().setFilter(match)
+
+    def setChecked(self, filename, checked):
+        self.model().setChecked(filename, checked)
+
+    def clear(self):
+        self.model().clear()
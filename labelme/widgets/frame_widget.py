@@ -0,0 +1,26 @@
+from qtpy import QtCore
+from qtpy import QtGui
+from qtpy import QtWidgets
+
+
+class FrameWidget(QtWidgets.QSpinBox):
+    """Current frame of a multi-frame image, counted from 1."""
+
+    def __init__(self):
+        super(FrameWidget, self).__init__()
+        self.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.setKeyboardTracking(False)
+        self.setFrameCount(1)
+        self.setToolTip("Frame")
+        self.setStatusTip(self.toolTip())
+        self.setAlignment(QtCore.Qt.AlignCenter)
+
+    def setFrameCount(self, count):
+        self.setRange(1, max(count, 1))
+        self.setSuffix(" / %d" % max(count, 1))
+
+    def minimumSizeHint(self):
+        height = super(FrameWidget, self).minimumSizeHint().height()
+        fm = QtGui.QFontMetrics(self.font())
+        width = fm.width(str(self.maximum()) + self.suffix())
+        return QtCore.QSize(width, height)
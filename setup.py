@@ -146,8 +146,10 @@ def main():
         entry_points={
             "console_scripts": [
                 "labelme=labelme.__main__:main",
+                "labelme_convert=labelme.cli.convert:main",
                 "labelme_draw_json=labelme.cli.draw_json:main",
                 "labelme_draw_label_png=labelme.cli.draw_label_png:main",
+                "labelme_export=labelme.cli.export:main",
                 "labelme_json_to_dataset=labelme.cli.json_to_dataset:main",
                 "labelme_on_docker=labelme.cli.on_docker:main",
             ],
@@ -64,6 +64,27 @@ def test_MainWindow_open_dir(qtbot):
     return win
 
 
+@pytest.mark.gui
+def test_MainWindow_windowLevelRequest(qtbot):
+    win = labelme.app.MainWindow()
+    qtbot.addWidget(win)
+    redraws = []
+    win.redrawCTImage = lambda: redraws.append(
+        (win.wc_value, win.ww_value)
+    )
+    wc_value, ww_value = win.wc_value, win.ww_value
+
+    # the requests of one timer interval are applied at once
+    for _ in range(3):
+        win.windowLevelRequest(2, 1)
+    assert redraws == []
+    qtbot.waitUntil(lambda: len(redraws) > 0)
+    qtbot.wait(2 * win.windowLevelTimer.interval())
+    assert redraws == [(wc_value + 3, ww_value + 6)]
+    assert win.wcWidget.value() == wc_value + 3
+    win.close()
+
+
 @pytest.mark.gui
 def test_MainWindow_openNextImg(qtbot):
     win = test_MainWindow_open_dir(qtbot)
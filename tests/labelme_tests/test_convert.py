@@ -0,0 +1,174 @@
+import json
+import os.path as osp
+
+import numpy as np
+import PIL.Image
+import pytest
+
+import labelme.utils
+from labelme import convert
+from labelme.label_file import LabelFile
+
+
+def test_imap():
+    for jobs in [1, 2]:
+        assert list(convert.imap(abs, range(-20, 0), jobs=jobs)) == list(
+            range(20, 0, -1)
+        )
+
+
+def test_coco_convert(tmp_path):
+    img = np.zeros((20, 30, 3), dtype=np.uint8)
+    imageData = labelme.utils.img_pil_to_data(PIL.Image.fromarray(img))
+    shapes = [
+        dict(label="a", points=[[2, 2], [12, 12]], shape_type="rectangle"),
+        dict(label="b", points=[[1, 1], [9, 2], [5, 8]], group_id=None),
+        dict(label="ignored", points=[[0, 0], [3, 3]], shape_type="circle"),
+    ]
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for name in ["c", "a", "b"]:
+        LabelFile().save(
+            str(input_dir / (name + ".json")),
+            shapes=[dict(shape, flags={}) for shape in shapes],
+            imagePath=name + ".png",
+            imageHeight=20,
+            imageWidth=30,
+            imageData=imageData,
+        )
+    labels_file = tmp_path / "labels.txt"
+    labels_file.write_text("__ignore__\n_background_\na\nb\n")
+
+    outputs = []
+    for jobs in [1, 2]:
+        output_dir = str(tmp_path / "output{}".format(jobs))
+        with open(
+            convert.coco.convert(
+                str(input_dir), output_dir, str(labels_file), jobs=jobs
+            )
+        ) as f:
+            data = json.load(f)
+        assert osp.exists(osp.join(output_dir, "JPEGImages", "c.jpg"))
+        del data["info"]
+        outputs.append(data)
+    assert outputs[0] == outputs[1]
+
+    data = outputs[0]
+    assert [image["file_name"] for image in data["images"]] == [
+        "JPEGImages/a.jpg",
+        "JPEGImages/b.jpg",
+        "JPEGImages/c.jpg",
+    ]
+    assert [ann["id"] for ann in data["annotations"]] == list(range(6))
+    assert [ann["image_id"] for ann in data["annotations"]] == [
+        0,
+        0,
+        1,
+        1,
+        2,
+        2,
+    ]
+    assert data["annotations"][0]["bbox"] == [2.0, 2.0, 11.0, 11.0]
+
+    # no shape with a known label
+    labels_file.write_text("__ignore__\n_background_\nc\n")
+    with open(
+        convert.coco.convert(
+            str(input_dir), str(tmp_path / "output"), str(labels_file)
+        )
+    ) as f:
+        assert json.load(f)["annotations"] == []
+
+
+def test_dicom_export(tmp_path):
+    pytest.importorskip("pydicom")
+    from .utils_tests.test_dicom import _save_frames
+
+    frames = np.arange(3 * 20 * 30, dtype=np.int16).reshape(3, 20, 30)
+    input_dir = tmp_path / "input"
+    (input_dir / "sub").mkdir(parents=True)
+    _save_frames(str(input_dir / "sub" / "cine.dcm"), frames)
+    shape = dict(label="a", points=[[2, 2], [12, 12]], shape_type="rectangle")
+    LabelFile().save(
+        str(input_dir / "sub" / "cine_0001.json"),
+        shapes=[dict(shape, flags={})],
+        imagePath="cine.dcm",
+        imageHeight=20,
+        imageWidth=30,
+        otherData=dict(frameIndex=1),
+    )
+    LabelFile().save(
+        str(input_dir / "b.json"),
+        shapes=[],
+        imagePath="b.png",
+        imageHeight=20,
+        imageWidth=30,
+    )
+    labels_file = tmp_path / "labels.txt"
+    labels_file.write_text("__ignore__\n_background_\na\n")
+
+    output_dir = tmp_path / "output"
+    convert.dicom.export(
+        str(input_dir), str(output_dir), str(labels_file), jobs=2
+    )
+    hu = np.load(str(output_dir / "images" / "sub" / "cine_0001.npy"))
+    assert hu.dtype == np.int16
+    np.testing.assert_array_equal(hu, frames[1] - 1024)
+    lbl = np.load(str(output_dir / "labels" / "sub" / "cine_0001.npy"))
+    assert lbl.dtype == np.uint8 and lbl.shape == (20, 30)
+    assert lbl[2:13, 2:13].all() and lbl.sum() == 11 * 11
+    with open(str(output_dir / "metadata" / "sub" / "cine_0001.json")) as f:
+        assert json.load(f)["frameIndex"] == 1
+    assert not (output_dir / "images" / "b.npy").exists()
+
+
+def test_dicom_export_volumes(tmp_path):
+    pytest.importorskip("pydicom")
+    from pydicom.uid import generate_uid
+
+    from .utils_tests.test_dicom import _save_frames
+
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    series_uid = generate_uid()
+    shape = dict(
+        label="a",
+        points=[[2, 2], [12, 12]],
+        shape_type="rectangle",
+        flags={},
+    )
+    for i, z in enumerate([2.5, 0.0, 5.0]):
+        _save_frames(
+            str(input_dir / ("%d.dcm" % i)),
+            np.full((20, 30), i, dtype=np.int16),
+            SeriesInstanceUID=series_uid,
+            ImagePositionPatient=[0, 0, z],
+            ImageOrientationPatient=[1, 0, 0, 0, 1, 0],
+        )
+        if i != 1:
+            LabelFile().save(
+                str(input_dir / ("%d.json" % i)),
+                shapes=[shape] if i == 0 else [],
+                imagePath="%d.dcm" % i,
+                imageHeight=20,
+                imageWidth=30,
+            )
+    labels_file = tmp_path / "labels.txt"
+    labels_file.write_text("__ignore__\n_background_\na\n")
+
+    output_dir = tmp_path / "output"
+    convert.dicom.export_volumes(
+        str(input_dir), str(output_dir), str(labels_file), jobs=2
+    )
+    base = str(output_dir / "volumes" / series_uid)
+    image = np.load(base + "_image.npy")
+    assert image.dtype == np.int16 and image.shape == (3, 20, 30)
+    # in slice order along z
+    np.testing.assert_array_equal(image[:, 0, 0], np.array([1, 0, 2]) - 1024)
+    label = np.load(base + "_label.npy")
+    assert label.dtype == np.uint8
+    assert label[1].sum() == 11 * 11 and label[[0, 2]].sum() == 0
+    with open(base + ".json") as f:
+        metadata = json.load(f)
+    assert metadata["shape"] == [3, 20, 30]
+    assert [frame for _, frame in metadata["slices"]] == [0, 0, 0]
@@ -0,0 +1,178 @@
+import base64
+import json
+import math
+import os
+
+import numpy as np
+import PIL.Image
+import pytest
+
+import labelme.utils
+from labelme import label_file as label_file_module
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+
+
+def _image_data():
+    img = np.zeros((20, 30, 3), dtype=np.uint8)
+    return labelme.utils.img_pil_to_data(PIL.Image.fromarray(img))
+
+
+def test_LabelFile_lazy_imageData(tmp_path):
+    imageData = _image_data()
+    shape = dict(
+        label="a",
+        points=[[0, 0], [1, 1]],
+        shape_type="rectangle",
+        imageData="x",  # same key as the image, but in a shape
+    )
+    filename = str(tmp_path / "a.json")
+    LabelFile().save(
+        filename,
+        shapes=[shape],
+        imagePath="a.png",
+        imageHeight=20,
+        imageWidth=30,
+        imageData=imageData,
+    )
+
+    label_file = LabelFile(filename)
+    assert label_file._imageDataLoader is not None
+    assert label_file.shapes[0]["other_data"] == {"imageData": "x"}
+    assert label_file.imageData == imageData
+
+    # base64 with escaped newlines, as written by old versions
+    with open(filename) as f:
+        data = json.load(f)
+    data["imageData"] = base64.encodebytes(imageData).decode()
+    with open(filename, "w") as f:
+        json.dump(data, f)
+    label_file = LabelFile(filename)
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=2)
+    with pytest.raises(LabelFileError):
+        label_file.imageData
+    assert LabelFile(filename).imageData == imageData
+
+
+def test_LabelFile_imageStore(tmp_path):
+    imageData = _image_data()
+    store = labelme.utils.ImageStore(str(tmp_path / "images"))
+    for name in ["a.json", "b.json"]:
+        LabelFile().save(
+            str(tmp_path / name),
+            shapes=[],
+            imagePath="a.png",
+            imageHeight=20,
+            imageWidth=30,
+            imageData=imageData,
+            imageStore=store,
+        )
+
+    with open(str(tmp_path / "a.json")) as f:
+        data = json.load(f)
+    assert data["imageData"] is None
+    key = store.key(imageData)
+    assert data["imageDataRef"] == "images/{}/{}".format(key[:2], key)
+    assert len(list((tmp_path / "images").glob("*/*"))) == 1
+
+    label_file = LabelFile(str(tmp_path / "b.json"))
+    assert "imageDataRef" not in label_file.otherData
+    assert label_file.imageData == imageData
+
+
+@pytest.mark.parametrize("json_backend", ["json", "orjson"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_json_dumps(monkeypatch, json_backend, compact):
+    if json_backend == "orjson":
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(label_file_module, "json_backend", json_backend)
+    data = dict(
+        shapes=[
+            dict(label="ラベル", points=[(1.5, 2.0), (3, 4)], flags={}),
+            dict(label="b", points=[[1e-05, 0.0001], [1e16, -0.0]]),
+            dict(label="Type1", points=[[float("nan"), float("inf")]]),
+        ],
+        imageData=None,
+        large=2**70,
+    )
+    if compact:
+        expected = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        expected = json.dumps(data, ensure_ascii=False, indent=2)
+    content = label_file_module.json_dumps(data, compact=compact)
+    assert content == expected.encode("utf-8")
+    loaded = label_file_module.json_loads(content)
+    nan, inf = loaded["shapes"].pop()["points"][0]
+    assert math.isnan(nan) and inf == float("inf")
+    data["shapes"].pop()
+    assert loaded == json.loads(json.dumps(data))
+
+
+def test_json_dumps_exponent():
+    assert not label_file_module._EXPONENT.search(b'"Type1", "1e"')
+    assert label_file_module._EXPONENT.search(b"[1e16, 2]")
+    assert label_file_module._EXPONENT.search(b"[-1.5E-05]")
+
+
+def test_LabelFile_save_previousHash(tmp_path):
+    filename = str(tmp_path / "a.json")
+    kwargs = dict(
+        shapes=[dict(label="a", points=[[1, 2], [3, 4]])],
+        imagePath="a.png",
+        imageHeight=20,
+        imageWidth=30,
+        imageData=_image_data(),
+    )
+    contentHash = LabelFile().save(filename, **kwargs)
+    assert LabelFile().save(str(tmp_path / "b.json"), **kwargs) == contentHash
+
+    # an unchanged save does not rewrite the file
+    os.utime(filename, ns=(0, 0))
+    assert (
+        LabelFile().save(filename, previousHash=contentHash, **kwargs)
+        == contentHash
+    )
+    assert os.stat(filename).st_mtime_ns == 0
+
+    # unless it was deleted meanwhile
+    os.remove(filename)
+    LabelFile().save(filename, previousHash=contentHash, **kwargs)
+    assert LabelFile(filename).shapes[0]["label"] == "a"
+
+
+def test_write_atomic_failure(tmp_path, monkeypatch):
+    filename = tmp_path / "a.json"
+    filename.write_bytes(b"{}")
+
+    def replace(src, dst):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(label_file_module.os, "replace", replace)
+    with pytest.raises(OSError):
+        label_file_module._write_atomic(str(filename), b'{"a": 1}')
+    assert filename.read_bytes() == b"{}"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json"]
+
+
+def test_LabelFile_missing_image(tmp_path):
+    filename = str(tmp_path / "a.json")
+    LabelFile().save(
+        filename,
+        shapes=[],
+        imagePath="a.png",
+        imageHeight=20,
+        imageWidth=30,
+    )
+    label_file = LabelFile(filename)
+    with pytest.raises(LabelFileError):
+        label_file.imageData
+
+    (tmp_path / "a.png").write_bytes(b"not an image")
+    with pytest.raises(LabelFileError):
+        LabelFile(filename).imageData
+
+    PIL.Image.fromarray(np.zeros((20, 30), dtype=np.uint8)).save(
+        str(tmp_path / "a.png")
+    )
+    assert LabelFile(filename).imageData is not None
@@ -0,0 +1,60 @@
+import numpy as np
+from qtpy import QtCore
+
+from labelme.shape import Shape
+
+
+def test_Shape_nearest():
+    shape = Shape()
+    for x, y in [(0, 0), (10, 0), (10, 10), (0, 10)]:
+        shape.addPoint(QtCore.QPointF(x, y))
+    shape.close()
+    np.testing.assert_array_equal(
+        shape.points_array, [[0, 0], [10, 0], [10, 10], [0, 10]]
+    )
+
+    point = QtCore.QPointF(9, 1)
+    assert shape.nearestVertex(point, epsilon=2) == 1
+    assert shape.nearestVertex(point, epsilon=1) is None
+    # edge i goes from point i - 1 to point i
+    assert shape.nearestEdge(QtCore.QPointF(5, 9), epsilon=2) == 3
+    assert shape.nearestEdge(QtCore.QPointF(-1, 5), epsilon=2) == 0
+    assert shape.nearestEdge(QtCore.QPointF(5, 5), epsilon=2) is None
+
+    shape.moveVertexBy(1, QtCore.QPointF(-1, 1))
+    assert shape.points_array[1].tolist() == [9, 1]
+    assert shape.nearestVertex(point, epsilon=0) == 1
+    shape.insertPoint(1, QtCore.QPointF(5, 5))
+    assert shape.nearestVertex(QtCore.QPointF(5, 5), epsilon=0) == 1
+    assert Shape().nearestVertex(point, epsilon=10) is None
+    assert Shape().nearestEdge(point, epsilon=10) is None
+
+
+def test_Shape_paths():
+    shape = Shape()
+    for x, y in [(0, 0), (10, 0), (10, 10)]:
+        shape.addPoint(QtCore.QPointF(x, y))
+    path = shape._makePath()
+    assert shape._makePath() is path
+    assert shape.containsPoint(QtCore.QPointF(8, 2))
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 10, 10)
+    line_path = shape._makeLinePath()
+    vertex_path = shape._makeVertexPath()
+    assert shape._makeLinePath() is line_path
+    assert shape._makeVertexPath() is vertex_path
+
+    shape.highlightVertex(1, Shape.MOVE_VERTEX)
+    assert shape._makeVertexPath() is not vertex_path
+    assert shape._makeLinePath() is line_path
+
+    shape.moveBy(QtCore.QPointF(5, 5))
+    assert shape._makeLinePath() is not line_path
+    assert shape.boundingRect() == QtCore.QRectF(5, 5, 10, 10)
+    assert not shape.containsPoint(QtCore.QPointF(8, 2))
+
+    copied = shape.copy()
+    assert copied._path is None
+    assert copied.boundingRect() == shape.boundingRect()
+    # the path returned by makePath is not the cached one
+    shape.makePath().lineTo(100, 100)
+    assert shape.boundingRect() == QtCore.QRectF(5, 5, 10, 10)
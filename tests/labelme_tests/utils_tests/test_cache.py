@@ -0,0 +1,35 @@
+import numpy as np
+
+from labelme.utils import cache as cache_module
+
+
+def test_LRUCache_evicts_least_recently_used():
+    cache = cache_module.LRUCache(max_bytes=200)
+    cache.put("a", np.zeros(100, dtype=np.uint8))
+    cache.put("b", np.zeros(100, dtype=np.uint8))
+    assert cache.get("a") is not None  # "b" becomes least recently used
+    cache.put("c", np.zeros(100, dtype=np.uint8))
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.nbytes == 200
+
+
+def test_LRUCache_keeps_oversized_value():
+    cache = cache_module.LRUCache(max_bytes=10)
+    cache.put("a", b"x" * 5)
+    cache.put("b", b"x" * 100)
+    assert len(cache) == 1
+    assert cache.get("b") == b"x" * 100
+
+
+def test_LRUCache_on_evict():
+    evicted = []
+    cache = cache_module.LRUCache(
+        max_bytes=10, on_evict=lambda key, value: evicted.append(key)
+    )
+    cache.put("a", b"x" * 5)
+    cache.put("b", b"x" * 5)
+    cache.pop("a")
+    cache.put("c", b"x" * 10)
+    assert evicted == ["b"]
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from labelme.utils import dicom as dicom_module
+
+
+pydicom = pytest.importorskip("pydicom")
+
+
+def _save_frames(filename, frames, bits_stored=16, **attrs):
+    from pydicom.dataset import Dataset
+    from pydicom.dataset import FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian
+    from pydicom.uid import generate_uid
+
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.7"
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds = Dataset()
+    ds.file_meta = meta
+    ds.SOPClassUID = meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    if frames.ndim == 3:
+        ds.NumberOfFrames = frames.shape[0]
+    ds.Rows, ds.Columns = frames.shape[-2:]
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = bits_stored
+    ds.HighBit = bits_stored - 1
+    ds.PixelRepresentation = 1
+    ds.RescaleSlope = 1
+    ds.RescaleIntercept = -1024
+    ds.PixelData = frames.astype(np.int16).tobytes()
+    for key, value in attrs.items():
+        setattr(ds, key, value)
+    ds.save_as(filename, enforce_file_format=True)
+
+
+@pytest.mark.parametrize("bits_stored", [16, 12])
+def test_DicomFile_frames(tmp_path, bits_stored):
+    frames = np.arange(5 * 4 * 3, dtype=np.int16).reshape(5, 4, 3) * 30
+    filename = str(tmp_path / "cine.dcm")
+    _save_frames(filename, frames, bits_stored=bits_stored)
+
+    dicom = dicom_module.DicomFile(filename)
+    assert len(dicom) == 5
+    pixels = dicom.frame(3)
+    np.testing.assert_array_equal(pixels.array, frames[3])
+    assert pixels.intercept == -1024
+    hu = pixels.to_hu()
+    assert hu.dtype == np.int16
+    np.testing.assert_array_equal(hu, frames[3] - 1024)
+    with pytest.raises(IndexError):
+        dicom.frame(5)
+
+
+def test_read_dicom_series(tmp_path):
+    from pydicom.uid import generate_uid
+
+    series_uid = generate_uid()
+    filenames = []
+    for i, z in enumerate([2.5, 0.0, 5.0]):
+        filename = str(tmp_path / ("%d.dcm" % i))
+        _save_frames(
+            filename,
+            np.full((4, 3), i, dtype=np.int16),
+            SeriesInstanceUID=series_uid,
+            ImagePositionPatient=[0, 0, z],
+            ImageOrientationPatient=[1, 0, 0, 0, 1, 0],
+        )
+        filenames.append(filename)
+    other = str(tmp_path / "other.dcm")
+    _save_frames(other, np.zeros((4, 3), dtype=np.int16))
+
+    series, others = dicom_module.read_dicom_series(filenames + [other])
+    assert others == [other]
+    assert len(series) == 1
+    series = series[0]
+    assert series.filenames == [filenames[1], filenames[0], filenames[2]]
+
+    pixels = series.slice(series.index(filenames[2]))
+    assert pixels.array.dtype == np.int16
+    assert np.all(pixels.array == 2)
+    assert pixels.array.base is series.slice(0).array.base
@@ -0,0 +1,93 @@
+import os
+
+from labelme.utils import file_index as file_index_module
+from labelme.utils import scan as scan_module
+
+
+def _scan(path, index):
+    return [
+        image
+        for batch, _ in scan_module.scan_images(
+            str(path), [".png"], index=index
+        )
+        for image in batch
+    ]
+
+
+def test_FileIndex_refresh(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    (data / "sub").mkdir(parents=True)
+    (data / "a.png").touch()
+    (data / "sub" / "b.png").touch()
+    index = file_index_module.FileIndex(str(tmp_path / "index.sqlite"))
+
+    listed = []
+    scandir = scan_module._scandir
+
+    def _scandir(path):
+        listed.append(os.path.relpath(path, str(data)))
+        return scandir(path)
+
+    monkeypatch.setattr(scan_module, "_scandir", _scandir)
+
+    images = _scan(data, index)
+    assert [os.path.basename(f) for f, _ in images] == ["a.png", "b.png"]
+    assert sorted(listed) == [".", "sub"]
+
+    # unchanged directories are not listed again
+    del listed[:]
+    assert _scan(data, index) == images
+    assert listed == []
+
+    (data / "sub" / "b.json").touch()
+    os.utime(str(data / "sub"), ns=(0, 1))
+    assert _scan(data, index)[1][1]
+    assert listed == ["sub"]
+
+    # the index persists across instances
+    index.close()
+    index = file_index_module.FileIndex(str(tmp_path / "index.sqlite"))
+    del listed[:]
+    assert _scan(data, index)[1][1]
+    assert listed == []
+
+
+def test_FileIndex_paths(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.dcm").write_bytes(b"a")
+    index = file_index_module.FileIndex(str(tmp_path / "index.sqlite"))
+
+    read = []
+
+    def read_slice_info(filename):
+        read.append(os.path.basename(filename))
+        return None
+
+    monkeypatch.setattr(scan_module, "read_slice_info", read_slice_info)
+
+    def scan(path):
+        return [
+            image
+            for batch, _ in scan_module.scan_images(
+                str(path), [".dcm"], index=index
+            )
+            for image in batch
+        ]
+
+    scan(data)
+    assert read == ["a.dcm"]
+
+    # a relative path shares the listing of the absolute one
+    monkeypatch.chdir(str(tmp_path))
+    scan("data")
+    assert read == ["a.dcm"]
+
+    # a DICOM file rewritten in place is read again
+    mtime_ns = os.stat(str(data)).st_mtime_ns
+    (data / "a.dcm").write_bytes(b"ab")
+    os.utime(str(data), ns=(mtime_ns, mtime_ns))
+    scan(data)
+    assert read == ["a.dcm", "a.dcm"]
+    scan(data)
+    assert read == ["a.dcm", "a.dcm"]
@@ -0,0 +1,25 @@
+from labelme.utils import GridIndex
+
+
+def test_GridIndex():
+    index = GridIndex(cell_size=10)
+    index.insert("a", (2, 2, 8, 8))
+    index.insert("b", (25, 15, 15, 45))  # unordered corners
+    index.insert("c", (100, 100, 100, 100))
+    assert len(index) == 3 and "b" in index
+
+    assert index.query(5, 5) == ["a"]
+    assert sorted(index.query(9, 5, margin=1)) == ["a"]
+    assert sorted(index.query(12, 12, margin=4)) == ["a", "b"]
+    assert index.query(15, 60) == []
+    assert index.query(101, 100, margin=2) == ["c"]
+
+    index.insert("a", (50, 50, 60, 60))
+    assert index.query(5, 5) == []
+    assert index.query(55, 55) == ["a"]
+
+    assert index.query(20, 30) == ["b"]
+    index.remove("b")
+    index.remove("missing")
+    assert index.query(20, 30) == []
+    assert len(index) == 2
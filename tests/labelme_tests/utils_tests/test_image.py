@@ -29,3 +29,9 @@ def test_img_data_to_png_data():
         img_data = f.read()
     png_data = image_module.img_data_to_png_data(img_data)
     assert isinstance(png_data, bytes)
+
+
+def test_img_data_to_size():
+    img_arr = np.zeros((20, 30, 3), dtype=np.uint8)
+    img_data = image_module.img_pil_to_data(PIL.Image.fromarray(img_arr))
+    assert image_module.img_data_to_size(img_data) == (20, 30)
@@ -0,0 +1,44 @@
+import threading
+
+from labelme.utils import LRUCache
+from labelme.utils import Prefetcher
+
+
+def test_prefetcher():
+    loaded = []
+    lock = threading.Lock()
+
+    def load(key):
+        with lock:
+            loaded.append(key)
+        return b"x" * key
+
+    cache = LRUCache(max_bytes=100)
+    prefetcher = Prefetcher(load, cache)
+    prefetcher.prefetch([1, 2, 3])
+    assert prefetcher.get(2) == b"xx"
+    assert prefetcher.get(4) == b"xxxx"
+    prefetcher.shutdown()
+    assert 4 in cache
+    assert loaded.count(2) == 1
+
+
+def test_prefetcher_discard():
+    started = threading.Event()
+    finish = threading.Event()
+
+    def load(key):
+        started.set()
+        finish.wait(5)
+        return b"x"
+
+    cache = LRUCache(max_bytes=100)
+    prefetcher = Prefetcher(load, cache, max_workers=1)
+    prefetcher.prefetch([1])
+    assert started.wait(5)
+    # the result of a load running when its key is discarded is not cached
+    prefetcher.discard([1])
+    finish.set()
+    prefetcher.shutdown()
+    prefetcher._executor.shutdown(wait=True)
+    assert 1 not in cache
@@ -0,0 +1,36 @@
+import numpy as np
+
+from labelme.utils import qt as qt_module
+
+
+def test_img_arr_to_qimage():
+    img = np.arange(120, dtype=np.uint8).reshape(10, 12)
+    qimage = qt_module.img_arr_to_qimage(img)
+    assert qimage.width() == 12
+    assert qimage.height() == 10
+    assert qimage.pixelColor(5, 1).red() == img[1, 5]
+
+    rgb = np.zeros((10, 12, 3), dtype=np.uint8)
+    rgb[..., 1] = 255
+    qimage = qt_module.img_arr_to_qimage(rgb)
+    assert qimage.pixelColor(0, 0).green() == 255
+
+
+def test_distances_to_lines():
+    from qtpy import QtCore
+
+    rng = np.random.RandomState(0)
+    starts = rng.uniform(0, 10, (50, 2))
+    ends = rng.uniform(0, 10, (50, 2))
+    ends[0] = starts[0]  # a point
+    point = (4.0, 6.0)
+    distances = qt_module.distances_to_lines(point, starts, ends)
+    expected = [
+        qt_module.distancetoline(
+            QtCore.QPointF(*point),
+            [QtCore.QPointF(*start), QtCore.QPointF(*end)],
+        )
+        for start, end in zip(starts, ends)
+    ]
+    np.testing.assert_allclose(distances, expected)
+    assert distances[0] == np.hypot(*(starts[0] - point))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from labelme.utils import RLEMask
+from labelme.utils import shape_to_mask
+
+
+def test_RLEMask():
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1:3, 1] = True
+    mask[3, 1:3] = True
+    mask[0, 4] = True
+    rle = RLEMask.from_mask(mask)
+    # column-major runs, starting with zeros
+    assert rle.counts == [5, 3, 3, 1, 4, 1, 3]
+    assert rle.to_coco() == {"size": [4, 5], "counts": "533N10O"}
+    assert rle.area == mask.sum()
+    assert rle.bbox == (0, 1, 4, 5)
+    np.testing.assert_array_equal(rle.decode(), mask)
+
+    other = np.zeros_like(mask)
+    other[:, 2:4] = True
+    union = rle | RLEMask.from_mask(other)
+    np.testing.assert_array_equal(union.decode(), mask | other)
+    assert union.bbox == (0, 1, 4, 5)
+
+    assert RLEMask((4, 5)).counts == [20]
+    assert RLEMask((4, 5)).bbox == (0, 0, 0, 0)
+
+
+def test_RLEMask_from_shape():
+    points = [[2, 3], [30, 5], [12, 18]]
+    rle = RLEMask.from_shape((20, 40), points)
+    mask = shape_to_mask((20, 40), points)
+    np.testing.assert_array_equal(rle.decode(), mask)
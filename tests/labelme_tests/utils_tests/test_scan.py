@@ -0,0 +1,73 @@
+import os
+import os.path as osp
+
+import natsort
+
+from labelme.utils import scan as scan_module
+
+
+def test_scan_images(tmp_path):
+    names = [
+        "x10.png",
+        "x2.png",
+        "a.png",
+        "a/y.jpg",
+        "b10/z.png",
+        "b2/c/w.png",
+        "b2/v.png",
+        "notes.txt",
+    ]
+    for name in names:
+        filename = tmp_path / name
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        filename.touch()
+    (tmp_path / "x2.json").touch()
+    (tmp_path / "b2" / "v.json").touch()
+
+    batches = list(
+        scan_module.scan_images(str(tmp_path), [".png", ".jpg"], batch_size=2)
+    )
+    images = [image for batch, _ in batches for image in batch]
+
+    expected = natsort.os_sorted(
+        osp.join(str(tmp_path), name)
+        for name in names
+        if not name.endswith(".txt")
+    )
+    assert [filename for filename, _ in images] == expected
+    labeled = [osp.relpath(f, str(tmp_path)) for f, label in images if label]
+    assert labeled == ["b2" + os.sep + "v.png", "x2.png"]
+    assert all(len(batch) <= 2 for batch, _ in batches)
+
+
+def test_scan_images_frame_labels(tmp_path):
+    for name in ["a.dcm", "b.dcm", "c_0001.png", "a_0002.json"]:
+        (tmp_path / name).touch()
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "b_0000.json").touch()
+
+    images = [
+        image
+        for batch, _ in scan_module.scan_images(
+            str(tmp_path), [".dcm", ".png"]
+        )
+        for image in batch
+    ]
+    labeled = [osp.basename(f) for f, label in images if label]
+    assert labeled == ["a.dcm"]
+
+    images = [
+        image
+        for batch, _ in scan_module.scan_images(
+            str(tmp_path), [".dcm", ".png"], output_dir=str(tmp_path / "out")
+        )
+        for image in batch
+    ]
+    labeled = [osp.basename(f) for f, label in images if label]
+    assert labeled == ["b.dcm"]
+
+    assert scan_module.has_label_file(str(tmp_path / "a.dcm"))
+    assert not scan_module.has_label_file(str(tmp_path / "b.dcm"))
+    assert scan_module.has_label_file(
+        str(tmp_path / "b.dcm"), output_dir=str(tmp_path / "out")
+    )
@@ -1,3 +1,5 @@
+import numpy as np
+
 from .util import get_img_and_data
 
 from labelme.utils import shape as shape_module
@@ -22,3 +24,40 @@ def test_shape_to_mask():
         points = shape["points"]
         mask = shape_module.shape_to_mask(img.shape[:2], points)
         assert mask.shape == img.shape[:2]
+
+
+def test_shapes_to_label_overlap():
+    shapes = [
+        dict(label="a", points=[[2, 2], [12, 12]], shape_type="rectangle"),
+        dict(label="b", points=[[8, 8], [4, 4]], shape_type="circle"),
+        dict(label="a", points=[[0, 0], [3, 0], [0, 3]], group_id=1),
+    ]
+    cls, ins = shape_module.shapes_to_label(
+        (20, 30), shapes, {"_background_": 0, "a": 1, "b": 2}
+    )
+    assert cls.shape == ins.shape == (20, 30)
+    assert cls.dtype == ins.dtype == np.int32
+    assert cls.flags.writeable and ins.flags.writeable
+    assert cls[8, 8] == 2 and ins[8, 8] == 2
+    assert cls[2, 12] == 1 and ins[2, 12] == 1
+    assert cls[1, 1] == 1 and ins[1, 1] == 3
+    assert cls[15, 15] == 0 and ins[15, 15] == 0
+    for shape in shapes[1:]:
+        mask = shape_module.shape_to_mask(
+            cls.shape, shape["points"], shape.get("shape_type")
+        )
+        assert (cls[mask] == {"a": 1, "b": 2}[shape["label"]]).all()
+
+
+def test_shape_to_mask_crop():
+    img_shape = (20, 30)
+    points = [[25, 3], [40, 8], [27, 12]]  # partly outside of the image
+    crop, (y1, x1) = shape_module.shape_to_mask_crop(img_shape, points)
+    assert crop.shape == (12, 6) and (y1, x1) == (2, 24)
+    mask = np.zeros(img_shape, dtype=bool)
+    mask[y1 : y1 + crop.shape[0], x1 : x1 + crop.shape[1]] = crop
+    np.testing.assert_array_equal(
+        mask, shape_module.shape_to_mask(img_shape, points)
+    )
+    bbox = shape_module.masks_to_bboxes(mask[None])[0]
+    assert tuple(bbox) == (3, 25, 13, 30)
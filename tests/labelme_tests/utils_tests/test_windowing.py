@@ -0,0 +1,47 @@
+import numpy as np
+
+from labelme.utils import windowing as windowing_module
+
+
+def test_window_hu():
+    hu = np.array([[-1000, 0, 40], [100, 240, 2000]], dtype=np.float32)
+    img = windowing_module.window_hu(hu, wc=40, ww=200, wf=1200)
+    assert img.dtype == np.uint8
+    assert img.shape == hu.shape
+    assert img[0, 0] == 0
+    assert img[1, 1] == 255
+    # values above wf are treated as 0
+    assert img[1, 2] == img[0, 1]
+    # the input is not modified
+    assert hu[1, 2] == 2000
+
+
+def test_window_hu_flat():
+    hu = np.full((4, 4), 50, dtype=np.float32)
+    img = windowing_module.window_hu(hu, wc=40, ww=200, wf=1200)
+    assert (img == 0).all()
+
+
+def test_apply_window_matches_window_hu():
+    rng = np.random.RandomState(0)
+    for dtype in [np.int16, np.uint16, np.uint8]:
+        info = np.iinfo(dtype)
+        stored = rng.randint(
+            max(info.min, -2048), min(info.max, 4096), size=(32, 32)
+        ).astype(dtype)
+        for slope, intercept in [(1, -1024), (0.5, -100)]:
+            hu = stored.astype(np.float32) * slope + intercept
+            for wc, ww in [(40, 200), (400, 1500), (-600, 700)]:
+                expected = windowing_module.window_hu(hu, wc, ww, wf=1200)
+                img = windowing_module.apply_window(
+                    stored, wc, ww, wf=1200, slope=slope, intercept=intercept
+                )
+                assert img.dtype == np.uint8
+                np.testing.assert_array_equal(img, expected)
+
+
+def test_apply_window_float_fallback():
+    stored = np.linspace(-1000, 1000, 64, dtype=np.float64).reshape(8, 8)
+    img = windowing_module.apply_window(stored, 40, 200, wf=1200)
+    expected = windowing_module.window_hu(stored, 40, 200, wf=1200)
+    np.testing.assert_array_equal(img, expected)
@@ -0,0 +1,86 @@
+import pytest
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.shape import Shape
+from labelme.widgets import Canvas
+
+
+def _shape(points, shape_type="polygon"):
+    shape = Shape(shape_type=shape_type)
+    for x, y in points:
+        shape.addPoint(QtCore.QPointF(x, y))
+    shape.close()
+    return shape
+
+
+@pytest.mark.gui
+def test_Canvas_shapesAt(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    a = _shape([(0, 0), (100, 0), (100, 100), (0, 100)])
+    b = _shape([(50, 50), (150, 50), (150, 150)])
+    c = _shape([(300, 300), (310, 310)], shape_type="rectangle")
+    canvas.loadShapes([a, b, c])
+
+    point = QtCore.QPointF(75, 75)
+    assert canvas.shapesAt(point) == [b, a]
+    assert canvas.shapesAt(QtCore.QPointF(295, 300)) == []
+    assert canvas.shapesAt(QtCore.QPointF(295, 300), epsilon=10) == [c]
+
+    b.moveBy(QtCore.QPointF(200, 200))
+    assert canvas.shapesAt(point) == [a]
+    canvas.setShapeVisible(a, False)
+    assert canvas.shapesAt(point) == []
+    canvas.setShapeVisible(a, True)
+    b.moveVertexBy(0, QtCore.QPointF(-200, -200))
+    assert canvas.shapesAt(point) == [b, a]
+
+    canvas.loadShapes([c])
+    assert canvas.shapesAt(point) == []
+
+
+class _Menu(object):
+    def __init__(self):
+        self.shown = 0
+
+    def exec_(self, pos):
+        self.shown += 1
+
+
+def _mouse_event(type, x, y, buttons=QtCore.Qt.RightButton):
+    return QtGui.QMouseEvent(
+        type,
+        QtCore.QPointF(x, y),
+        QtCore.Qt.RightButton,
+        buttons,
+        QtCore.Qt.ShiftModifier,
+    )
+
+
+@pytest.mark.gui
+def test_Canvas_windowLevelRequest(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.menus = (_Menu(), _Menu())
+    canvas.setWindowLevelEnabled(True)
+    requests = []
+    canvas.windowLevelRequest.connect(lambda dx, dy: requests.append((dx, dy)))
+
+    canvas.mousePressEvent(
+        _mouse_event(QtCore.QEvent.MouseButtonPress, 10, 10)
+    )
+    canvas.mouseMoveEvent(_mouse_event(QtCore.QEvent.MouseMove, 15, 8))
+    canvas.mouseMoveEvent(_mouse_event(QtCore.QEvent.MouseMove, 15, 8))
+    canvas.mouseMoveEvent(_mouse_event(QtCore.QEvent.MouseMove, 12, 20))
+    canvas.mouseReleaseEvent(
+        _mouse_event(
+            QtCore.QEvent.MouseButtonRelease,
+            12,
+            20,
+            buttons=QtCore.Qt.NoButton,
+        )
+    )
+    assert requests == [(5, -2), (-3, 12)]
+    # the drag does not end in the context menu
+    assert [menu.shown for menu in canvas.menus] == [0, 0]
@@ -0,0 +1,51 @@
+import pytest
+from qtpy import QtCore
+
+from labelme.widgets import filename_filter
+from labelme.widgets import FileListWidget
+
+
+def test_filename_filter():
+    filenames = ["a/img_01.dcm", "a/img_02.png", "b/img_10.dcm"]
+
+    def match(pattern):
+        return [f for f in filenames if filename_filter(pattern)(f)]
+
+    assert filename_filter("") is None
+    assert match("img_0") == ["a/img_01.dcm", "a/img_02.png"]
+    assert match("*.dcm") == ["a/img_01.dcm", "b/img_10.dcm"]
+    assert match("img_?1.*") == ["a/img_01.dcm"]
+    assert match("b/*") == ["b/img_10.dcm"]
+    assert match(r"re:_\d0\.") == ["b/img_10.dcm"]
+    assert match("re:[") == []
+
+
+@pytest.mark.gui
+def test_FileListWidget(qtbot):
+    widget = FileListWidget()
+    qtbot.addWidget(widget)
+
+    widget.addFiles([("a/1.png", False), ("a/2.png", True)])
+    widget.setFilter(filename_filter("*2*"))
+    widget.addFiles([("b/12.png", False), ("b/3.png", False)])
+    assert widget.filenames() == ["a/2.png", "b/12.png"]
+
+    widget.setChecked("b/12.png", True)
+    index = widget.model().index(1)
+    assert widget.model().data(index, QtCore.Qt.CheckStateRole) == (
+        QtCore.Qt.Checked
+    )
+
+    widget.setFilter(None)
+    assert widget.count() == 4
+    widget.setCurrentRow(3)
+    assert widget.selectedFiles() == ["b/3.png"]
+
+    files = widget.fileList()
+    assert len(files) == 4
+    assert files[-1] == "b/3.png"
+    assert files.index("b/12.png") == 2
+    widget.setFilter(filename_filter("b/"))
+    assert "a/1.png" not in files
+    assert files.index("b/3.png") == 1
+    assert list(files) == ["b/12.png", "b/3.png"]